@@ -1,21 +1,31 @@
 """FastAPI entry point for the local Gamma watermark remover."""
 
-import logging
+from collections.abc import Awaitable, Callable
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from routes import APP_VERSION, router, templates
+from routes import APP_VERSION, render_error, router
 from utils.cleanup import create_lifespan, ensure_directories
+from utils.logging_config import configure_logging
+from utils.upload_processing import (
+    BATCH_TOO_LARGE_ERROR,
+    MAX_BATCH_REQUEST_SIZE,
+    MAX_UPLOAD_SIZE,
+    UPLOAD_TOO_LARGE_ERROR,
+)
 
 UPLOAD_FOLDER = "uploads"
 OUTPUT_FOLDER = "outputs"
 CLEANUP_INTERVAL = 600
 MAX_FILE_AGE = 3600
+# Per-worker cap on open connections; uvicorn answers 503 beyond it.
+LIMIT_CONCURRENCY = 64
+# Room for multipart boundaries and part headers around a single file.
+MAX_REQUEST_SIZE = MAX_UPLOAD_SIZE + 64 * 1024
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+configure_logging()
 
 ensure_directories(UPLOAD_FOLDER, OUTPUT_FOLDER)
 
@@ -27,38 +37,48 @@ app = FastAPI(
 app.include_router(router)
 
 
+@app.middleware("http")
+async def limit_request_size(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    Reject oversized uploads from Content-Length before reading the body.
+
+    The form route carries one file. The batch API may carry several, so it
+    is capped at MAX_BATCH_REQUEST_SIZE in total; each file in it is still
+    held to MAX_UPLOAD_SIZE while it is processed.
+    """
+    content_length = request.headers.get("content-length", "")
+    size = int(content_length) if content_length.isdigit() else 0
+    if request.url.path == "/remove_watermark" and size > MAX_REQUEST_SIZE:
+        return render_error(request, UPLOAD_TOO_LARGE_ERROR, 413)
+    if request.url.path == "/api/remove_watermarks" and size > MAX_BATCH_REQUEST_SIZE:
+        return JSONResponse(status_code=413, content={"error": BATCH_TOO_LARGE_ERROR})
+    return await call_next(request)
+
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(
     request: Request, exc: StarletteHTTPException
 ) -> object:
     """Render HTTP errors as the main page with an error message."""
     if exc.status_code == 404:
-        return templates.TemplateResponse(
-            request,
-            "index.html",
-            {"error_message": "Page not found."},
-            status_code=404,
-        )
-    return templates.TemplateResponse(
-        request,
-        "index.html",
-        {"error_message": f"Server error: {exc.detail}"},
-        status_code=exc.status_code,
-    )
+        return render_error(request, "Page not found.", 404)
+    return render_error(request, f"Server error: {exc.detail}", exc.status_code)
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception) -> object:
     """Catch unhandled exceptions and render a 500 error page."""
-    return templates.TemplateResponse(
-        request,
-        "index.html",
-        {"error_message": f"Internal server error: {exc}"},
-        status_code=500,
-    )
+    return render_error(request, f"Internal server error: {exc}", 500)
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="localhost", port=8999)
+    # An import string lets uvicorn spawn WEB_CONCURRENCY worker processes.
+    # uvloop and httptools from uvicorn[standard] are picked up automatically
+    # where available (uvloop does not support Windows).
+    uvicorn.run(
+        "app:app", host="localhost", port=8999, limit_concurrency=LIMIT_CONCURRENCY
+    )
@@ -1,9 +1,25 @@
-"""Watermark detection and removal processors."""
+"""Watermark detection and removal processors.
 
-from processors.pdf.detector import WatermarkDetector
-from processors.pdf.remover import WatermarkRemover
-from processors.pptx.detector import PPTXWatermarkDetector
-from processors.pptx.remover import PPTXWatermarkRemover
+The exported classes are imported on first access, so loading one format's
+processor (e.g. processors.pptx in a worker process) does not also import
+PyMuPDF for the PDF classes.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from processors.pdf.detector import WatermarkDetector
+    from processors.pdf.remover import WatermarkRemover
+    from processors.pptx.detector import PPTXWatermarkDetector
+    from processors.pptx.remover import PPTXWatermarkRemover
+
+_EXPORTS = {
+    "WatermarkDetector": "processors.pdf.detector",
+    "WatermarkRemover": "processors.pdf.remover",
+    "PPTXWatermarkDetector": "processors.pptx.detector",
+    "PPTXWatermarkRemover": "processors.pptx.remover",
+}
 
 __all__ = [
     "WatermarkDetector",
@@ -11,3 +27,16 @@ __all__ = [
     "PPTXWatermarkDetector",
     "PPTXWatermarkRemover",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
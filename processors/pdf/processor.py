@@ -2,7 +2,6 @@
 
 import logging
 
-from processors.pdf.detector import WatermarkDetector
 from processors.pdf.remover import WatermarkRemover
 
 logger = logging.getLogger(__name__)
@@ -12,28 +11,27 @@ class PDFProcessor:
     """Handles PDF watermark detection and removal."""
 
     def __init__(self) -> None:
-        self.detector = WatermarkDetector()
         self.remover = WatermarkRemover()
 
-    def process(self, upload_path: str, output_path: str, filename: str) -> dict:
-        """Process PDF file for watermark detection and removal."""
+    def process(
+        self, upload_path: str | bytes, output_path: str, filename: str
+    ) -> dict:
+        """Process a PDF path or in-memory PDF for watermark removal."""
         logger.info("Processing PDF file: %s", filename)
-        elements_to_remove, error = self.detector.identify_watermarks(upload_path)
-
-        if error:
-            return {"success": False, "error": error}
-
-        if not elements_to_remove:
+        try:
+            found, images_removed, links_removed = self.remover.identify_and_clean(
+                upload_path, output_path
+            )
+        except Exception as exc:
+            return {"success": False, "error": f"Error processing PDF: {exc}"}
+
+        if not found:
             return {
                 "success": True,
                 "has_watermark": False,
                 "message": "Gamma.app watermarks not found in PDF.",
             }
 
-        logger.info("Removing watermarks from PDF...")
-        images_removed, links_removed = self.remover.clean_pdf_from_target_domain(
-            upload_path, output_path
-        )
         total_removed = images_removed + links_removed
 
         return {
@@ -1,4 +1,6 @@
 import logging
+from collections.abc import Iterable
+from typing import cast
 
 import fitz
 
@@ -10,9 +12,17 @@ class WatermarkRemover:
         self.target_domain = target_domain
 
     def clean_pdf_from_target_domain(
-        self, pdf_path: str, output_path: str
+        self,
+        pdf_path: str,
+        output_path: str,
+        elements_to_remove: list[dict[str, object]] | None = None,
     ) -> tuple[int, int]:
-        """Cleans PDF from target domain elements"""
+        """Cleans PDF from target domain elements
+
+        When elements_to_remove from WatermarkDetector.identify_watermarks is
+        given, only the pages it reported are visited and the corner image
+        scan is skipped on pages where it found no linked corner image.
+        """
 
         pdf_document = fitz.open(pdf_path)
 
@@ -23,14 +33,82 @@ class WatermarkRemover:
         total_images_removed = 0
         total_links_removed = 0
 
-        for page_num in range(len(pdf_document)):
+        page_numbers: Iterable[int]
+        if elements_to_remove is None:
+            page_numbers = range(len(pdf_document))
+            image_pages = None
+        else:
+            page_numbers = sorted({cast(int, e["page"]) for e in elements_to_remove})
+            image_pages = {
+                cast(int, e["page"])
+                for e in elements_to_remove
+                if e["type"] == "corner_image_with_link"
+            }
+
+        total_images_removed, total_links_removed = self._clean_pages(
+            pdf_document, page_numbers, image_pages
+        )
+
+        # Save result
+        pdf_document.save(output_path)
+        pdf_document.close()
+
+        self._log_result(total_images_removed, total_links_removed, output_path)
+
+        return total_images_removed, total_links_removed
+
+    def identify_and_clean(
+        self, pdf_source: str | bytes, output_path: str
+    ) -> tuple[bool, int, int]:
+        """Finds and removes target domain elements with one open of the PDF
+
+        pdf_source is a file path or the PDF content already held in memory.
+        Every page that WatermarkDetector would flag carries a target link, so
+        the removal counts double as detection. The output file is only
+        written when something was removed.
+        """
+        if isinstance(pdf_source, bytes):
+            pdf_document = fitz.open(stream=pdf_source, filetype="pdf")
+        else:
+            pdf_document = fitz.open(pdf_source)
+        try:
+            logger.info(f"Processing file: {pdf_document.name or '<in memory>'}")
+            logger.info(f"Number of pages: {len(pdf_document)}")
+
+            images_removed, links_removed = self._clean_pages(
+                pdf_document, range(len(pdf_document)), None
+            )
+            found = bool(images_removed or links_removed)
+            if found:
+                pdf_document.save(output_path)
+                self._log_result(images_removed, links_removed, output_path)
+            else:
+                logger.info(f"\n{self.target_domain} domain elements not found in PDF.")
+        finally:
+            pdf_document.close()
+
+        return found, images_removed, links_removed
+
+    def _clean_pages(
+        self,
+        pdf_document: fitz.Document,
+        page_numbers: Iterable[int],
+        image_pages: set[int] | None,
+    ) -> tuple[int, int]:
+        """Removes target elements from the given pages, returns removal counts"""
+        total_images_removed = 0
+        total_links_removed = 0
+
+        for page_num in page_numbers:
             page = pdf_document[page_num]
             logger.info(f"\nPage {page_num + 1}:")
 
             # 1. Remove images in bottom right corner with target links
-            images_removed = self._remove_corner_images_with_links(
-                page, self.target_domain
-            )
+            images_removed = 0
+            if image_pages is None or page_num in image_pages:
+                images_removed = self._remove_corner_images_with_links(
+                    page, self.target_domain
+                )
             total_images_removed += images_removed
 
             # 2. Remove all links to target domain
@@ -40,18 +118,17 @@ class WatermarkRemover:
             if not (images_removed or links_removed):
                 logger.info("    No target elements found")
 
-        # Save result
-        pdf_document.save(output_path)
-        pdf_document.close()
+        return total_images_removed, total_links_removed
 
+    @staticmethod
+    def _log_result(images_removed: int, links_removed: int, output_path: str) -> None:
+        """Logs the removal summary"""
         logger.info(f"\n{'=' * 60}")
         logger.info("RESULT:")
-        logger.info(f"Links removed: {total_links_removed}")
-        logger.info(f"Images removed: {total_images_removed}")
+        logger.info(f"Links removed: {links_removed}")
+        logger.info(f"Images removed: {images_removed}")
         logger.info(f"Cleaned file: {output_path}")
 
-        return total_images_removed, total_links_removed
-
     def _has_target_link(
         self, obj_rect: fitz.Rect, page: fitz.Page, target_domain: str
     ) -> tuple[bool, str]:
@@ -2,5 +2,6 @@
 
 from processors.pptx.detector import PPTXWatermarkDetector
 from processors.pptx.remover import PPTXWatermarkRemover
+from processors.pptx.session import PPTXSession, open_pptx
 
-__all__ = ["PPTXWatermarkDetector", "PPTXWatermarkRemover"]
+__all__ = ["PPTXSession", "PPTXWatermarkDetector", "PPTXWatermarkRemover", "open_pptx"]
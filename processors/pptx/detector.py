@@ -7,20 +7,29 @@ images with hyperlinks to gamma.app.
 """
 
 import logging
-from collections.abc import Iterable
-from typing import Any
+import math
+from collections.abc import Iterable, Iterator
+from contextlib import closing
 
-from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
+from processors.pptx.package import PictureShape, PPTXPackage, PPTXSource
+
 logger = logging.getLogger(__name__)
 
+# Every match is a p:pic element (PPTXPackage.corner_pictures selects only
+# those), reported the way the installed python-pptx names a picture.
+PICTURE_SHAPE_TYPE = str(MSO_SHAPE_TYPE.PICTURE)
+
 
 class PPTXWatermarkDetector:
     """Detects Gamma watermarks in PPTX files."""
 
     def __init__(
-        self, target_domain: str = "gamma.app", corner_threshold: float = 0.70
+        self,
+        target_domain: str = "gamma.app",
+        corner_threshold: float = 0.70,
+        cache_parts: bool = False,
     ) -> None:
         """
         Initialize the detector.
@@ -29,16 +38,20 @@ class PPTXWatermarkDetector:
             target_domain: The domain to look for in hyperlinks (default: "gamma.app")
             corner_threshold: Position threshold for bottom-right corner
                 detection (default: 0.70)
+            cache_parts: Reuse parsed parts across calls on the same file path,
+                see PPTXPackage (default: False)
         """
         self.target_domain = target_domain.lower()
         self.corner_threshold = corner_threshold
+        self.cache_parts = cache_parts
 
-    def detect_watermarks(self, pptx_path: str) -> list[dict[str, object]]:
+    def detect_watermarks(self, pptx_path: PPTXSource) -> list[dict[str, object]]:
         """
         Detect watermarks in a PPTX file.
 
         Args:
-            pptx_path: Path to the PPTX file to analyze
+            pptx_path: Path to the PPTX file to analyze, its content as bytes,
+                or a seekable binary stream
 
         Returns:
             A list of dictionaries containing watermark detection results, each with:
@@ -54,72 +67,108 @@ class PPTXWatermarkDetector:
         results = []
 
         try:
-            prs = Presentation(pptx_path)
-            slide_width = int(prs.slide_width or 0)
-            slide_height = int(prs.slide_height or 0)
-
-            logger.info(f"Analyzing PPTX file: {pptx_path}")
-            logger.info(f"Slide dimensions: {slide_width} x {slide_height} EMUs")
-            logger.info(f"Target domain: {self.target_domain}")
-            logger.info(f"Corner threshold: {self.corner_threshold * 100:.0f}%")
-
-            # Iterate through all slide masters
-            for master_idx, master in enumerate(prs.slide_masters):
-                logger.info(f"\nSlide Master {master_idx + 1}:")
-
-                # Check shapes in the slide master itself
-                master_results = self._check_shapes(
-                    shapes=master.shapes,
-                    slide_width=slide_width,
-                    slide_height=slide_height,
-                    location_type="slide_master",
-                    location_name=f"SlideMaster{master_idx + 1}",
-                )
-                results.extend(master_results)
-
-                # Iterate through all slide layouts in this master
-                for layout_idx, layout in enumerate(master.slide_layouts):
-                    layout_name = (
-                        layout.name if layout.name else f"Layout{layout_idx + 1}"
-                    )
-                    logger.info(f"  Checking Layout {layout_idx + 1}: {layout_name}")
-
-                    layout_results = self._check_shapes(
-                        shapes=layout.shapes,
-                        slide_width=slide_width,
-                        slide_height=slide_height,
-                        location_type="slide_layout",
-                        location_name=layout_name,
+            with closing(PPTXPackage(pptx_path, self.cache_parts)) as package:
+                slide_width = package.slide_width
+                slide_height = package.slide_height
+
+                logger.info("Analyzing PPTX file: %s", package.label)
+                logger.info("Slide dimensions: %s x %s EMUs", slide_width, slide_height)
+                logger.info("Target domain: %s", self.target_domain)
+                logger.info("Corner threshold: %.0f%%", self.corner_threshold * 100)
+
+                # Slide masters, each followed by its slide layouts
+                for part in package.parts():
+                    if part.location_type == "slide_master":
+                        logger.info("\n%s:", part.location_name)
+                    else:
+                        logger.info("  Checking Layout: %s", part.location_name)
+
+                    results.extend(
+                        self.check_shapes(
+                            shapes=package.corner_pictures(
+                                part.root, part.partname, self.corner_threshold
+                            ),
+                            slide_width=slide_width,
+                            slide_height=slide_height,
+                            location_type=part.location_type,
+                            location_name=part.location_name,
+                        )
                     )
-                    results.extend(layout_results)
 
             # Summary
             watermark_count = sum(1 for r in results if r["is_watermark"])
-            logger.info(f"\n{'=' * 60}")
+            logger.info("\n%s", "=" * 60)
             logger.info("DETECTION SUMMARY:")
-            logger.info(f"Total suspicious shapes found: {len(results)}")
-            logger.info(f"Confirmed watermarks (gamma.app link): {watermark_count}")
+            logger.info("Total suspicious shapes found: %s", len(results))
+            logger.info("Confirmed watermarks (gamma.app link): %s", watermark_count)
 
             if watermark_count > 0:
                 logger.info("\nWatermark locations:")
                 for r in results:
                     if r["is_watermark"]:
                         logger.info(
-                            f"  ✓ {r['location_name']}: {r['shape_name']} "
-                            f"({r['hyperlink']})"
+                            "  ✓ %s: %s (%s)",
+                            r["location_name"],
+                            r["shape_name"],
+                            r["hyperlink"],
                         )
             else:
-                logger.info(f"\nNo {self.target_domain} watermarks detected.")
+                logger.info("\nNo %s watermarks detected.", self.target_domain)
 
             return results
 
         except Exception as e:
-            logger.error(f"Error detecting watermarks: {str(e)}")
+            logger.error("Error detecting watermarks: %s", e)
             raise
 
-    def _check_shapes(
+    def has_watermarks(self, pptx_path: PPTXSource) -> bool:
+        """
+        Check whether a PPTX file contains at least one Gamma watermark.
+
+        Stops at the first watermark found and builds no result dictionaries.
+        Decks whose relationship parts never mention the target domain are
+        rejected by a byte scan, before any XML is parsed.
+
+        Args:
+            pptx_path: Path to the PPTX file, its content as bytes, or a
+                seekable binary stream
+        """
+        return next(self._iter_watermark_pictures(pptx_path), None) is not None
+
+    def get_watermark_count(self, pptx_path: PPTXSource) -> int:
+        """
+        Count the Gamma watermarks (corner pictures linking to the target domain).
+
+        Args:
+            pptx_path: Path to the PPTX file, its content as bytes, or a
+                seekable binary stream
+        """
+        return sum(1 for _ in self._iter_watermark_pictures(pptx_path))
+
+    def _iter_watermark_pictures(
+        self, pptx_path: PPTXSource
+    ) -> Iterator[tuple[str, PictureShape]]:
+        """Yield (location name, picture) for each watermark, lazily."""
+        with closing(PPTXPackage(pptx_path, self.cache_parts)) as package:
+            if not package.mentions(self.target_domain):
+                return
+            for part in package.parts():
+                for shape in package.corner_pictures(
+                    part.root, part.partname, self.corner_threshold
+                ):
+                    if self.is_watermark(shape):
+                        yield part.location_name, shape
+
+    def is_watermark(self, shape: PictureShape) -> bool:
+        """Whether a corner picture links to the target domain."""
+        return (
+            shape.hyperlink is not None
+            and self.target_domain in shape.hyperlink.lower()
+        )
+
+    def check_shapes(
         self,
-        shapes: Iterable[Any],
+        shapes: Iterable[PictureShape],
         slide_width: int,
         slide_height: int,
         location_type: str,
@@ -129,7 +178,7 @@ class PPTXWatermarkDetector:
         Check shapes for potential watermarks.
 
         Args:
-            shapes: Collection of shapes to check
+            shapes: Corner pictures from PPTXPackage.corner_pictures to check
             slide_width: Width of the slide in EMUs
             slide_height: Height of the slide in EMUs
             location_type: Type of location ("slide_master" or "slide_layout")
@@ -138,50 +187,39 @@ class PPTXWatermarkDetector:
         Returns:
             List of detection results for shapes in corner positions
         """
-        results = []
+        results: list[dict[str, object]] = []
+        if slide_width <= 0 or slide_height <= 0:
+            return results
+
+        # Loop invariants: integer EMU bounds, so the per-shape test is an int
+        # compare (offsets are ints, so ceil keeps ">= threshold" exact)
+        target_domain = self.target_domain
+        min_left = math.ceil(self.corner_threshold * slide_width)
+        min_top = math.ceil(self.corner_threshold * slide_height)
 
         for shape in shapes:
-            # Only check picture shapes
-            if shape.shape_type != MSO_SHAPE_TYPE.PICTURE:
+            # Already filtered by offset in the XPath; keep the check cheap
+            if shape.left < min_left or shape.top < min_top:
                 continue
 
-            # Calculate position percentages
-            left_pct = shape.left / slide_width if slide_width > 0 else 0
-            top_pct = shape.top / slide_height if slide_height > 0 else 0
-
-            # Check if in bottom-right corner
-            is_in_corner = (
-                left_pct >= self.corner_threshold and top_pct >= self.corner_threshold
-            )
-
-            if not is_in_corner:
-                continue
+            # Percentages are needed for the result and the log line alike
+            left_pct = shape.left / slide_width * 100
+            top_pct = shape.top / slide_height * 100
 
             # Get hyperlink if present
-            hyperlink_url = None
-            has_gamma_link = False
-
-            try:
-                if hasattr(shape, "click_action") and shape.click_action:
-                    if (
-                        hasattr(shape.click_action, "hyperlink")
-                        and shape.click_action.hyperlink
-                    ):
-                        hyperlink = shape.click_action.hyperlink
-                        if hasattr(hyperlink, "address") and hyperlink.address:
-                            hyperlink_url = hyperlink.address
-                            has_gamma_link = self.target_domain in hyperlink_url.lower()
-            except Exception as e:
-                logger.debug(f"Could not get hyperlink for shape: {e}")
+            hyperlink_url = shape.hyperlink
+            has_gamma_link = (
+                hyperlink_url is not None and target_domain in hyperlink_url.lower()
+            )
 
             # Determine if this is a watermark
             is_watermark = has_gamma_link
 
-            result = {
+            result: dict[str, object] = {
                 "location_type": location_type,
                 "location_name": location_name,
                 "shape_name": shape.name,
-                "shape_type": str(shape.shape_type),
+                "shape_type": PICTURE_SHAPE_TYPE,
                 "position": {
                     "left": shape.left,
                     "top": shape.top,
@@ -189,8 +227,8 @@ class PPTXWatermarkDetector:
                     "height": shape.height,
                 },
                 "position_percent": {
-                    "left_pct": left_pct * 100,
-                    "top_pct": top_pct * 100,
+                    "left_pct": left_pct,
+                    "top_pct": top_pct,
                 },
                 "hyperlink": hyperlink_url,
                 "is_watermark": is_watermark,
@@ -198,14 +236,18 @@ class PPTXWatermarkDetector:
 
             if is_watermark:
                 logger.info(
-                    f"    ✓ Found watermark: {shape.name} at "
-                    f"({left_pct * 100:.1f}%, {top_pct * 100:.1f}%) "
-                    f"-> {hyperlink_url}"
+                    "    ✓ Found watermark: %s at (%.1f%%, %.1f%%) -> %s",
+                    shape.name,
+                    left_pct,
+                    top_pct,
+                    hyperlink_url,
                 )
             else:
                 logger.debug(
-                    f"    Corner image without gamma link: {shape.name} at "
-                    f"({left_pct * 100:.1f}%, {top_pct * 100:.1f}%)"
+                    "    Corner image without gamma link: %s at (%.1f%%, %.1f%%)",
+                    shape.name,
+                    left_pct,
+                    top_pct,
                 )
 
             results.append(result)
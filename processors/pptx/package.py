@@ -0,0 +1,401 @@
+"""Direct access to the slide master and layout XML inside a PPTX package.
+
+The detector and remover only need the pictures placed on slide masters and
+layouts, so instead of loading the whole deck through python-pptx the package
+is opened as a ZIP and just those parts are parsed with lxml.
+"""
+
+import copy
+import io
+import math
+import os
+import posixpath
+import shutil
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from collections.abc import Hashable, Iterator
+from functools import cached_property
+from typing import IO, Generic, NamedTuple, TypeVar
+
+from lxml import etree
+
+PPTXSource = str | bytes | IO[bytes]
+T = TypeVar("T")
+
+PART_CACHE_SIZE = 64
+COPY_CHUNK_SIZE = 1 << 20
+
+NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+OFFICE_DOCUMENT_RELTYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+# Same as python-pptx's parser: never expand entities from untrusted decks.
+_XML_PARSER = etree.XMLParser(resolve_entities=False)
+
+# Pictures directly on the shape tree whose top-left corner lies past the
+# given offsets; python-pptx treats pictures with a video file as movies.
+_CORNER_PICTURES = etree.XPath(
+    "p:cSld/p:spTree/p:pic[not(p:nvPicPr/p:nvPr/a:videoFile)]"
+    "[p:spPr/a:xfrm/a:off/@x >= $min_left and p:spPr/a:xfrm/a:off/@y >= $min_top]",
+    namespaces=NS,
+)
+# Per-picture and per-part lookups, compiled once instead of re-parsing a
+# path expression for every element.
+_HYPERLINK_ID = etree.XPath(
+    "p:nvPicPr/p:cNvPr/a:hlinkClick/@r:id", namespaces=NS, smart_strings=False
+)
+_PICTURE_NAME = etree.XPath(
+    "string(p:nvPicPr/p:cNvPr/@name)", namespaces=NS, smart_strings=False
+)
+_PICTURE_OFFSET = etree.XPath("p:spPr/a:xfrm/a:off", namespaces=NS)
+_PICTURE_EXTENT = etree.XPath("p:spPr/a:xfrm/a:ext", namespaces=NS)
+_PART_NAME = etree.XPath("string(p:cSld/@name)", namespaces=NS, smart_strings=False)
+_SLIDE_SIZE = etree.XPath("p:sldSz", namespaces=NS)
+_SLIDE_MASTER_IDS = etree.XPath(
+    "p:sldMasterIdLst/p:sldMasterId/@r:id", namespaces=NS, smart_strings=False
+)
+_SLIDE_LAYOUT_IDS = etree.XPath(
+    "p:sldLayoutIdLst/p:sldLayoutId/@r:id", namespaces=NS, smart_strings=False
+)
+_SLIDE_IDS = etree.XPath("p:sldIdLst/p:sldId", namespaces=NS)
+_RELATIONSHIPS = etree.XPath("rel:Relationship", namespaces=NS)
+
+# ZIP64 extended information extra field (APPNOTE 4.5.3); zipfile writes its
+# own when needed, so a copied one must not be carried over.
+_ZIP64_EXTRA_ID = 0x0001
+
+
+class _PartCache(Generic[T]):
+    """Thread-safe LRU of values parsed from PPTX files on disk."""
+
+    def __init__(self, maxsize: int = PART_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, T] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> T | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: T) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Parsed parts and relationship maps of files on disk, keyed by path, size,
+# mtime and part name, so a detect pass followed by a remove pass over the
+# same deck inflates and parses each master and layout once. Only packages
+# opened with cache_parts=True use them.
+_parsed_parts: _PartCache[etree._Element] = _PartCache()
+_parsed_relationships: _PartCache[dict[str, str]] = _PartCache()
+
+
+class PackagePart(NamedTuple):
+    """A parsed slide master or layout and the name reported for it."""
+
+    location_type: str
+    location_name: str
+    partname: str
+    root: etree._Element
+
+
+class PictureShape(NamedTuple):
+    """The attributes of a p:pic element the watermark checks look at."""
+
+    element: etree._Element
+    name: str
+    left: int
+    top: int
+    width: int
+    height: int
+    hyperlink: str | None
+
+
+class PPTXPackage:
+    """A PPTX file opened as a ZIP archive, with masters and layouts indexed."""
+
+    def __init__(self, source: PPTXSource, cache_parts: bool = False) -> None:
+        """
+        Open the package and locate the presentation part.
+
+        Args:
+            source: Path to the PPTX file, its content as bytes, or a seekable
+                binary stream
+            cache_parts: Share parsed parts with later packages opened from the
+                same unchanged file; only worth it for callers that reopen a
+                path (default: False)
+        """
+        zip_source: str | IO[bytes]
+        if isinstance(source, str):
+            self.label = source
+            zip_source = source
+        elif isinstance(source, bytes):
+            self.label = "<in memory>"
+            zip_source = io.BytesIO(source)
+        else:
+            source.seek(0)
+            self.label = getattr(source, "name", "<in memory>")
+            zip_source = source
+        # zipfile opens and closes a path itself; streams stay the caller's.
+        self._zip = zipfile.ZipFile(zip_source)
+
+        # Only files on disk have an identity (path, size, mtime) to cache by.
+        self._cache_key: tuple[str, int, int] | None = None
+        if cache_parts and isinstance(source, str) and self._zip.fp is not None:
+            stat = os.fstat(self._zip.fp.fileno())
+            self._cache_key = (
+                os.path.abspath(source),
+                stat.st_size,
+                stat.st_mtime_ns,
+            )
+
+        # Only the package relationships are read up front; presentation.xml
+        # is parsed on first use, so mentions() alone stays a byte scan.
+        self.presentation_partname = self._office_document_partname()
+        self._relationships: dict[str, dict[str, str]] = {}
+
+    @cached_property
+    def _presentation(self) -> etree._Element:
+        """Root element of the presentation part."""
+        return self.load(self.presentation_partname)
+
+    @cached_property
+    def slide_width(self) -> int:
+        """Slide width in EMUs (0 if the presentation does not set one)."""
+        slide_size = _SLIDE_SIZE(self._presentation)
+        return int(slide_size[0].get("cx", 0)) if slide_size else 0
+
+    @cached_property
+    def slide_height(self) -> int:
+        """Slide height in EMUs (0 if the presentation does not set one)."""
+        slide_size = _SLIDE_SIZE(self._presentation)
+        return int(slide_size[0].get("cy", 0)) if slide_size else 0
+
+    @cached_property
+    def slide_count(self) -> int:
+        """Number of slides listed in the presentation."""
+        return len(_SLIDE_IDS(self._presentation))
+
+    def close(self) -> None:
+        """Close the underlying ZIP archive."""
+        self._zip.close()
+
+    def mentions(self, text: str) -> bool:
+        """
+        Check case-insensitively whether any relationship part contains text.
+
+        Hyperlink targets only live in .rels parts, so a domain that appears in
+        none of them cannot be linked from any shape. This is a plain byte
+        search over a few small entries, without parsing any XML.
+        """
+        needle = text.lower().encode()
+        return any(
+            needle in self._zip.read(info).lower()
+            for info in self._zip.infolist()
+            if info.filename.endswith(".rels")
+        )
+
+    def parts(self) -> Iterator[PackagePart]:
+        """
+        Yield slide masters and their layouts in presentation order.
+
+        Parts are parsed as they are reached, so callers that stop early skip
+        the rest. Names match what python-pptx reports: "SlideMaster<n>" for
+        masters and the layout's own name, or "Layout<n>" when it has none.
+        """
+        master_ids = _SLIDE_MASTER_IDS(self._presentation)
+        for master_idx, master_rid in enumerate(master_ids):
+            master_partname = self.related_partname(
+                self.presentation_partname, master_rid
+            )
+            master = self.load(master_partname)
+            yield PackagePart(
+                "slide_master", f"SlideMaster{master_idx + 1}", master_partname, master
+            )
+            for layout_idx, layout_rid in enumerate(_SLIDE_LAYOUT_IDS(master)):
+                layout_partname = self.related_partname(master_partname, layout_rid)
+                layout = self.load(layout_partname)
+                yield PackagePart(
+                    "slide_layout",
+                    _PART_NAME(layout) or f"Layout{layout_idx + 1}",
+                    layout_partname,
+                    layout,
+                )
+
+    def load(self, partname: str) -> etree._Element:
+        """
+        Parse a part's XML and return its root element.
+
+        The tree belongs to the caller and may be modified; with cache_parts,
+        parts of files on disk are served as copies of a cached parse.
+        """
+        if self._cache_key is None:
+            return etree.fromstring(self._zip.read(partname), _XML_PARSER)
+
+        key = (*self._cache_key, partname)
+        root = _parsed_parts.get(key)
+        if root is None:
+            root = etree.fromstring(self._zip.read(partname), _XML_PARSER)
+            _parsed_parts.put(key, root)
+        return copy.deepcopy(root)
+
+    def relationships(self, partname: str) -> dict[str, str]:
+        """
+        Map relationship ids of a part to their (unresolved) targets.
+
+        The returned dict may be shared with other packages and must not be
+        modified.
+        """
+        relationships = self._relationships.get(partname)
+        if relationships is not None:
+            return relationships
+
+        key = None if self._cache_key is None else (*self._cache_key, partname)
+        if key is not None:
+            relationships = _parsed_relationships.get(key)
+        if relationships is None:
+            relationships = self._read_relationships(partname)
+            if key is not None:
+                _parsed_relationships.put(key, relationships)
+        self._relationships[partname] = relationships
+        return relationships
+
+    def _read_relationships(self, partname: str) -> dict[str, str]:
+        """Parse the .rels part belonging to partname."""
+        directory, filename = posixpath.split(partname)
+        rels_name = posixpath.join(directory, "_rels", f"{filename}.rels")
+        try:
+            rels = self._zip.read(rels_name)
+        except KeyError:
+            return {}
+        return {
+            rel.get("Id"): rel.get("Target")
+            for rel in _RELATIONSHIPS(etree.fromstring(rels, _XML_PARSER))
+        }
+
+    def related_partname(self, partname: str, r_id: str) -> str:
+        """Resolve an internal relationship of a part to a ZIP member name."""
+        target = self.relationships(partname)[r_id]
+        if target.startswith("/"):
+            return target[1:]
+        return posixpath.normpath(posixpath.join(posixpath.dirname(partname), target))
+
+    def corner_pictures(
+        self, root: etree._Element, partname: str, corner_threshold: float
+    ) -> list[PictureShape]:
+        """
+        Return the pictures in the bottom-right corner of a master or layout.
+
+        The position test runs inside one compiled XPath, so only the few
+        pictures past corner_threshold of the slide size are turned into
+        PictureShape records and have their hyperlinks resolved.
+        """
+        pictures = []
+        for pic in _CORNER_PICTURES(
+            root,
+            min_left=math.ceil(corner_threshold * self.slide_width),
+            min_top=math.ceil(corner_threshold * self.slide_height),
+        ):
+            # The corner XPath only matches pictures that have an offset.
+            offset = _PICTURE_OFFSET(pic)[0]
+            extent = _PICTURE_EXTENT(pic)
+            hyperlink_ids = _HYPERLINK_ID(pic)
+            hyperlink = (
+                self.relationships(partname).get(hyperlink_ids[0])
+                if hyperlink_ids
+                else None
+            )
+
+            pictures.append(
+                PictureShape(
+                    element=pic,
+                    name=_PICTURE_NAME(pic),
+                    left=int(offset.get("x")),
+                    top=int(offset.get("y")),
+                    width=int(extent[0].get("cx", 0)) if extent else 0,
+                    height=int(extent[0].get("cy", 0)) if extent else 0,
+                    hyperlink=hyperlink,
+                )
+            )
+        return pictures
+
+    def save(self, output_path: str, modified: dict[str, etree._Element]) -> None:
+        """
+        Write a copy of the package with some parts replaced.
+
+        Every entry keeps its name, order, date, compression type, attributes
+        and extra fields. Unchanged entries are streamed across, so large
+        media is never held in memory at once; only the modified parts are
+        serialized again.
+
+        Args:
+            output_path: Path to save the new PPTX file to
+            modified: Root elements of changed parts, keyed by part name
+        """
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        with zipfile.ZipFile(output_path, "w") as output:
+            for info in self._zip.infolist():
+                target = _copy_info(info)
+                root = modified.get(info.filename)
+                if root is not None:
+                    data = etree.tostring(root, encoding="UTF-8", standalone=True)
+                    output.writestr(target, data)
+                    continue
+                # The size lets zipfile decide on ZIP64 before writing.
+                target.file_size = info.file_size
+                with self._zip.open(info) as src, output.open(target, "w") as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+    def _office_document_partname(self) -> str:
+        """Find the main presentation part from the package relationships."""
+        rels = etree.fromstring(self._zip.read("_rels/.rels"), _XML_PARSER)
+        for rel in _RELATIONSHIPS(rels):
+            if rel.get("Type") == OFFICE_DOCUMENT_RELTYPE:
+                return rel.get("Target").lstrip("/")
+        raise ValueError("Not a PowerPoint file: no main document part found")
+
+
+def _copy_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """A fresh ZipInfo with the metadata of info, for writing to a new archive."""
+    copied = zipfile.ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    copied.comment = info.comment
+    copied.create_system = info.create_system
+    copied.internal_attr = info.internal_attr
+    copied.external_attr = info.external_attr
+    copied.extra = _strip_zip64_extra(info.extra)
+    return copied
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Drop ZIP64 records from an extra field, keeping all others in order."""
+    kept = []
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, offset)
+        end = offset + 4 + size
+        if header_id != _ZIP64_EXTRA_ID:
+            kept.append(extra[offset:end])
+        offset = end
+    return b"".join(kept)
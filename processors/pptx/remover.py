@@ -7,21 +7,37 @@ images with hyperlinks to gamma.app.
 """
 
 import logging
+import math
+import multiprocessing
 import os
 from collections.abc import Iterable
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import repeat
 
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+from lxml import etree
+
+from processors.pptx.package import (
+    PackagePart,
+    PictureShape,
+    PPTXPackage,
+    PPTXSource,
+)
 
 logger = logging.getLogger(__name__)
 
+# A picture to remove, its hyperlink and whether that links to the target domain
+WatermarkShape = tuple[PictureShape, str | None, bool]
+
 
 class PPTXWatermarkRemover:
     """Removes Gamma watermarks from PPTX files."""
 
     def __init__(
-        self, target_domain: str = "gamma.app", corner_threshold: float = 0.70
+        self,
+        target_domain: str = "gamma.app",
+        corner_threshold: float = 0.70,
+        cache_parts: bool = False,
     ) -> None:
         """
         Initialize the remover.
@@ -30,17 +46,29 @@ class PPTXWatermarkRemover:
             target_domain: The domain to look for in hyperlinks (default: "gamma.app")
             corner_threshold: Position threshold for bottom-right corner
                 detection (default: 0.70)
+            cache_parts: Reuse parsed parts across calls on the same file path,
+                see PPTXPackage (default: False)
         """
         self.target_domain = target_domain.lower()
         self.corner_threshold = corner_threshold
+        self.cache_parts = cache_parts
 
-    def remove_watermarks(self, input_path: str, output_path: str) -> dict[str, object]:
+    def remove_watermarks(
+        self,
+        input_path: PPTXSource,
+        output_path: str,
+        detected: list[dict[str, object]] | None = None,
+    ) -> dict[str, object]:
         """
         Remove watermarks from a PPTX file and save to a new file.
 
         Args:
-            input_path: Path to the input PPTX file
+            input_path: Path to the input PPTX file, its content as bytes, or a
+                seekable binary stream (e.g. the one given to the detector)
             output_path: Path to save the cleaned PPTX file
+            detected: Optional results from PPTXWatermarkDetector.detect_watermarks;
+                masters and layouts without a reported corner picture are
+                skipped instead of being scanned again
 
         Returns:
             A dictionary containing:
@@ -49,179 +77,341 @@ class PPTXWatermarkRemover:
                 - layouts_cleaned: Number of layouts that had watermarks removed
                 - error: Error message if any
         """
-        result = {
-            "success": False,
-            "watermarks_removed": 0,
-            "layouts_cleaned": 0,
-            "masters_cleaned": 0,
-            "slide_count": 0,
-            "error": None,
-        }
-
         try:
-            prs = Presentation(input_path)
-            slide_width = int(prs.slide_width or 0)
-            slide_height = int(prs.slide_height or 0)
+            with closing(PPTXPackage(input_path, self.cache_parts)) as package:
+                slide_width = package.slide_width
+                slide_height = package.slide_height
+
+                logger.info("Processing PPTX file: %s", package.label)
+                logger.info("Slide dimensions: %s x %s EMUs", slide_width, slide_height)
+                logger.info("Target domain: %s", self.target_domain)
+                logger.info("Corner threshold: %.0f%%", self.corner_threshold * 100)
+
+                candidates = (
+                    None
+                    if detected is None
+                    else {(d["location_type"], d["location_name"]) for d in detected}
+                )
+                found = []
+                # Slide masters, each followed by its slide layouts
+                for part in package.parts():
+                    key = (part.location_type, part.location_name)
+                    if candidates is not None and key not in candidates:
+                        continue
+                    logger.info("  Processing %s", part.location_name)
+                    found.append(
+                        (
+                            part,
+                            self.find_watermark_shapes(
+                                package.corner_pictures(
+                                    part.root, part.partname, self.corner_threshold
+                                ),
+                                slide_width,
+                                slide_height,
+                            ),
+                        )
+                    )
 
-            logger.info(f"Processing PPTX file: {input_path}")
-            logger.info(f"Slide dimensions: {slide_width} x {slide_height} EMUs")
-            logger.info(f"Target domain: {self.target_domain}")
-            logger.info(f"Corner threshold: {self.corner_threshold * 100:.0f}%")
+                result = self.save_cleaned(package, found, output_path)
 
-            total_removed = 0
-            layouts_cleaned = 0
-            masters_cleaned = 0
+        except Exception as e:
+            error_msg = f"Error removing watermarks: {str(e)}"
+            logger.error(error_msg)
+            return _removal_result(error=error_msg)
 
-            # Iterate through all slide masters
-            for master_idx, master in enumerate(prs.slide_masters):
-                logger.info(f"\nSlide Master {master_idx + 1}:")
+        if result["success"]:
+            logger.info("\n%s", "=" * 60)
+            logger.info("REMOVAL SUMMARY:")
+            logger.info("Watermarks removed: %s", result["watermarks_removed"])
+            logger.info("Layouts cleaned: %s", result["layouts_cleaned"])
+            logger.info("Masters cleaned: %s", result["masters_cleaned"])
+            logger.info("Output file: %s", output_path)
 
-                # Remove watermarks from the slide master itself
-                master_removed = self._remove_watermarks_from_shapes(
-                    shapes=master.shapes,
-                    slide_width=slide_width,
-                    slide_height=slide_height,
-                )
-                if master_removed > 0:
-                    masters_cleaned += 1
-                total_removed += master_removed
-
-                # Iterate through all slide layouts in this master
-                for layout_idx, layout in enumerate(master.slide_layouts):
-                    layout_name = (
-                        layout.name if layout.name else f"Layout{layout_idx + 1}"
-                    )
-                    logger.info(f"  Processing Layout {layout_idx + 1}: {layout_name}")
+        return result
 
-                    layout_removed = self._remove_watermarks_from_shapes(
-                        shapes=layout.shapes,
-                        slide_width=slide_width,
-                        slide_height=slide_height,
-                    )
+    def detect_and_remove(
+        self, input_path: PPTXSource, output_path: str
+    ) -> dict[str, object]:
+        """
+        Detect and remove watermarks with a single load of the presentation.
 
-                    if layout_removed > 0:
-                        layouts_cleaned += 1
-                    total_removed += layout_removed
+        The output file is only written when at least one picture linking to
+        the target domain was found.
 
-            # Ensure output directory exists
-            output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+        Args:
+            input_path: Path to the input PPTX file, its content as bytes, or a
+                seekable binary stream
+            output_path: Path to save the cleaned PPTX file
 
-            # Save the cleaned presentation
-            prs.save(output_path)
+        Returns:
+            The same dictionary as remove_watermarks, plus:
+                - watermarks_detected: Number of corner pictures linking to the
+                  target domain (0 means nothing was removed or written)
+                - detected: One entry per removed picture with its
+                  location_type, location_name, shape_name and hyperlink
+            slide_count stays 0 when the package has no link to the target
+            domain at all.
+        """
+        result = _removal_result(watermarks_detected=0, detected=[])
 
-            result["success"] = True
-            result["watermarks_removed"] = total_removed
-            result["layouts_cleaned"] = layouts_cleaned
-            result["masters_cleaned"] = masters_cleaned
-            result["slide_count"] = len(prs.slides)
+        try:
+            with closing(PPTXPackage(input_path, self.cache_parts)) as package:
+                logger.info("Processing PPTX file: %s", package.label)
+
+                # Checked before anything reads presentation.xml, so decks
+                # without a single target link are never parsed.
+                if not package.mentions(self.target_domain):
+                    logger.info("No %s links in the package.", self.target_domain)
+                    result["success"] = True
+                    return result
+
+                slide_width = package.slide_width
+                slide_height = package.slide_height
+                logger.info("Slide dimensions: %s x %s EMUs", slide_width, slide_height)
+                result["slide_count"] = package.slide_count
+
+                found = []
+                for part in package.parts():
+                    if part.location_type == "slide_master":
+                        logger.info("\n%s:", part.location_name)
+                    found.append(
+                        (
+                            part,
+                            self.find_watermark_shapes(
+                                package.corner_pictures(
+                                    part.root, part.partname, self.corner_threshold
+                                ),
+                                slide_width,
+                                slide_height,
+                            ),
+                        )
+                    )
 
-            # Summary
-            logger.info(f"\n{'=' * 60}")
-            logger.info("REMOVAL SUMMARY:")
-            logger.info(f"Watermarks removed: {total_removed}")
-            logger.info(f"Layouts cleaned: {layouts_cleaned}")
-            logger.info(f"Masters cleaned: {masters_cleaned}")
-            logger.info(f"Output file: {output_path}")
+                detected = sum(
+                    1 for _, shapes in found for _, _, linked in shapes if linked
+                )
+                result["watermarks_detected"] = detected
+                if detected == 0:
+                    logger.info("No %s watermarks detected.", self.target_domain)
+                    result["success"] = True
+                    return result
+
+                result["detected"] = [
+                    {
+                        "location_type": part.location_type,
+                        "location_name": part.location_name,
+                        "shape_name": shape.name,
+                        "hyperlink": hyperlink_url,
+                    }
+                    for part, shapes in found
+                    for shape, hyperlink_url, _ in shapes
+                ]
+
+                result.update(self.save_cleaned(package, found, output_path))
+
+            if result["success"]:
+                logger.info("\n%s", "=" * 60)
+                logger.info("REMOVAL SUMMARY:")
+                logger.info("Watermarks detected: %s", detected)
+                logger.info("Watermarks removed: %s", result["watermarks_removed"])
+                logger.info("Output file: %s", output_path)
 
             return result
 
         except Exception as e:
-            error_msg = f"Error removing watermarks: {str(e)}"
+            error_msg = f"Error removing watermarks: {e}"
             logger.error(error_msg)
             result["error"] = error_msg
             return result
 
-    def _remove_watermarks_from_shapes(
+    def save_cleaned(
+        self,
+        package: PPTXPackage,
+        found: Iterable[tuple[PackagePart, list[WatermarkShape]]],
+        output_path: str,
+    ) -> dict[str, object]:
+        """
+        Remove the shapes found in each part and save the cleaned deck.
+
+        Args:
+            package: The open deck the parts belong to
+            found: (part, find_watermark_shapes result) pairs; may be lazy
+            output_path: Path to save the cleaned PPTX file
+
+        Returns:
+            The same dictionary as remove_watermarks
+        """
+        try:
+            total_removed = 0
+            layouts_cleaned = 0
+            masters_cleaned = 0
+            modified: dict[str, etree._Element] = {}
+            for part, shapes_to_remove in found:
+                removed = self.remove_shapes(shapes_to_remove)
+                if removed > 0:
+                    modified[part.partname] = part.root
+                    if part.location_type == "slide_master":
+                        masters_cleaned += 1
+                    else:
+                        layouts_cleaned += 1
+                total_removed += removed
+
+            package.save(output_path, modified)
+
+        except Exception as e:
+            error_msg = f"Error removing watermarks: {e}"
+            logger.error(error_msg)
+            return _removal_result(error=error_msg)
+
+        return _removal_result(
+            success=True,
+            watermarks_removed=total_removed,
+            layouts_cleaned=layouts_cleaned,
+            masters_cleaned=masters_cleaned,
+            slide_count=package.slide_count,
+        )
+
+    def clean_many(
+        self, jobs: Iterable[tuple[str, str]], workers: int | None = None
+    ) -> list[dict[str, object]]:
+        """
+        Run detect_and_remove on several decks in parallel worker processes.
+
+        Each deck is independent work, so this is the entry point to use for
+        more than one file. Decks are handed to a process pool that bypasses
+        the GIL.
+
+        Args:
+            jobs: (input_path, output_path) pairs
+            workers: Number of processes (default: one per CPU, at most one per
+                deck)
+
+        Returns:
+            The detect_and_remove result of each job, in order
+        """
+        jobs = list(jobs)
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1:
+            return [self.detect_and_remove(src, dst) for src, dst in jobs]
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            return list(
+                pool.map(
+                    _detect_and_remove_one,
+                    repeat(self.target_domain),
+                    repeat(self.corner_threshold),
+                    [src for src, _ in jobs],
+                    [dst for _, dst in jobs],
+                )
+            )
+
+    def find_watermark_shapes(
         self,
-        shapes: Iterable[Any],
+        shapes: Iterable[PictureShape],
         slide_width: int,
         slide_height: int,
-    ) -> int:
+    ) -> list[WatermarkShape]:
         """
-        Remove watermark shapes from a collection of shapes.
+        Collect watermark shapes from a collection of shapes.
 
         Args:
-            shapes: Collection of shapes to process
+            shapes: Corner pictures from PPTXPackage.corner_pictures to check
             slide_width: Width of the slide in EMUs
             slide_height: Height of the slide in EMUs
         Returns:
-            Number of watermarks removed
+            List of (shape, hyperlink URL, links to target domain) tuples
         """
-        shapes_to_remove = []
+        shapes_to_remove: list[WatermarkShape] = []
+        if slide_width <= 0 or slide_height <= 0:
+            return shapes_to_remove
+
+        # Loop invariants: integer EMU bounds, so the per-shape tests are int
+        # compares (offsets are ints, so ceil/floor keep the bounds exact)
+        target_domain = self.target_domain
+        min_left = math.ceil(self.corner_threshold * slide_width)
+        min_top = math.ceil(self.corner_threshold * slide_height)
+        extreme_left = math.floor(0.85 * slide_width)
+        extreme_top = math.floor(0.90 * slide_height)
 
         for shape in shapes:
-            # Only check picture shapes
-            if shape.shape_type != MSO_SHAPE_TYPE.PICTURE:
-                continue
-
-            # Calculate position percentages
-            left_pct = shape.left / slide_width if slide_width > 0 else 0
-            top_pct = shape.top / slide_height if slide_height > 0 else 0
-
-            # Check if in bottom-right corner
-            is_in_corner = (
-                left_pct >= self.corner_threshold and top_pct >= self.corner_threshold
-            )
-
-            if not is_in_corner:
+            # Already filtered by offset in the XPath; keep the check cheap
+            if shape.left < min_left or shape.top < min_top:
                 continue
 
             # Check for gamma hyperlink
-            has_gamma_link = False
-            hyperlink_url = None
-
-            try:
-                if hasattr(shape, "click_action") and shape.click_action:
-                    if (
-                        hasattr(shape.click_action, "hyperlink")
-                        and shape.click_action.hyperlink
-                    ):
-                        hyperlink = shape.click_action.hyperlink
-                        if hasattr(hyperlink, "address") and hyperlink.address:
-                            hyperlink_url = hyperlink.address
-                            has_gamma_link = self.target_domain in hyperlink_url.lower()
-            except Exception as e:
-                logger.debug(f"Could not get hyperlink for shape: {e}")
+            hyperlink_url = shape.hyperlink
+            has_gamma_link = (
+                hyperlink_url is not None and target_domain in hyperlink_url.lower()
+            )
 
             # Remove if it has a gamma link OR if it's a small image in the corner
-            # (some watermarks might not have accessible hyperlinks via python-pptx)
+            # (some watermarks have no hyperlink relationship at all)
             should_remove = has_gamma_link
 
             # Also check for small images in corner that might be watermarks
             # Typical watermark size: ~1.7M x 0.4M EMUs
-            if not should_remove and is_in_corner:
+            if not should_remove:
                 # Check if it's a small image (likely a logo/watermark)
                 if shape.width < 2000000 and shape.height < 600000:  # < ~2.2" x 0.66"
                     # Additional heuristic: check if it's in the extreme corner
-                    if left_pct > 0.85 and top_pct > 0.90:
+                    if shape.left > extreme_left and shape.top > extreme_top:
                         logger.info(
-                            "    Found small corner image "
-                            f"(potential watermark): {shape.name}"
+                            "    Found small corner image (potential watermark): %s",
+                            shape.name,
                         )
                         should_remove = True
 
             if should_remove:
-                shapes_to_remove.append((shape, hyperlink_url))
+                shapes_to_remove.append((shape, hyperlink_url, has_gamma_link))
 
-        # Remove the identified shapes
+        return shapes_to_remove
+
+    @staticmethod
+    def remove_shapes(
+        shapes_to_remove: list[WatermarkShape],
+    ) -> int:
+        """Remove the given shapes from their shape trees and return the count."""
         removed_count = 0
-        for shape, hyperlink_url in shapes_to_remove:
+        for shape, hyperlink_url, _ in shapes_to_remove:
             try:
-                # Get the XML element and remove it from its parent
-                sp = shape._element
-                parent = sp.getparent()
+                # Remove the p:pic element from its shape tree
+                parent = shape.element.getparent()
                 if parent is not None:
-                    parent.remove(sp)
+                    parent.remove(shape.element)
                     removed_count += 1
                     if hyperlink_url:
                         logger.info(
-                            f"    ✓ Removed watermark: {shape.name} -> {hyperlink_url}"
+                            "    ✓ Removed watermark: %s -> %s",
+                            shape.name,
+                            hyperlink_url,
                         )
                     else:
-                        logger.info(f"    ✓ Removed corner image: {shape.name}")
+                        logger.info("    ✓ Removed corner image: %s", shape.name)
             except Exception as e:
-                logger.error(f"    ✗ Failed to remove shape {shape.name}: {e}")
+                logger.error("    ✗ Failed to remove shape %s: %s", shape.name, e)
 
         return removed_count
+
+
+def _removal_result(**values: object) -> dict[str, object]:
+    """A remove_watermarks result dictionary with the given fields set."""
+    result: dict[str, object] = {
+        "success": False,
+        "watermarks_removed": 0,
+        "layouts_cleaned": 0,
+        "masters_cleaned": 0,
+        "slide_count": 0,
+        "error": None,
+    }
+    result.update(values)
+    return result
+
+
+def _detect_and_remove_one(
+    target_domain: str, corner_threshold: float, input_path: str, output_path: str
+) -> dict[str, object]:
+    """Clean one deck in a worker process (module-level so it can be pickled)."""
+    remover = PPTXWatermarkRemover(target_domain, corner_threshold)
+    return remover.detect_and_remove(input_path, output_path)
@@ -0,0 +1,161 @@
+"""
+Shared detection and removal over one opened PPTX package.
+
+PPTXWatermarkDetector and PPTXWatermarkRemover each open the deck they are
+given. A PPTXSession opens it once, finds the corner pictures of every
+slide master and layout once, and runs both steps on that index.
+"""
+
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from processors.pptx.detector import PPTXWatermarkDetector
+from processors.pptx.package import PackagePart, PictureShape, PPTXPackage, PPTXSource
+from processors.pptx.remover import PPTXWatermarkRemover
+
+logger = logging.getLogger(__name__)
+
+
+class PPTXSession:
+    """One PPTX deck opened for detection followed by removal."""
+
+    def __init__(
+        self,
+        source: PPTXSource,
+        target_domain: str = "gamma.app",
+        corner_threshold: float = 0.70,
+    ) -> None:
+        """
+        Open the deck.
+
+        Args:
+            source: Path to the PPTX file, its content as bytes, or a seekable
+                binary stream
+            target_domain: The domain to look for in hyperlinks (default: "gamma.app")
+            corner_threshold: Position threshold for bottom-right corner
+                detection (default: 0.70)
+        """
+        self.detector = PPTXWatermarkDetector(target_domain, corner_threshold)
+        self.remover = PPTXWatermarkRemover(target_domain, corner_threshold)
+        self.package = PPTXPackage(source)
+        self._parts = self.package.parts()
+        self._corner_pictures: list[tuple[PackagePart, list[PictureShape]]] = []
+        self._removed = False
+
+    def close(self) -> None:
+        """Close the underlying package."""
+        self.package.close()
+
+    def _iter_corner_pictures(
+        self,
+    ) -> Iterator[tuple[PackagePart, list[PictureShape]]]:
+        """
+        Each master and layout with its corner pictures, in deck order.
+
+        Parts are indexed on first visit and remembered, so a walk that
+        stops early leaves the rest for the next one to index.
+        """
+        index = 0
+        while True:
+            if index == len(self._corner_pictures):
+                part = next(self._parts, None)
+                if part is None:
+                    return
+                self._corner_pictures.append(
+                    (
+                        part,
+                        self.package.corner_pictures(
+                            part.root, part.partname, self.detector.corner_threshold
+                        ),
+                    )
+                )
+            yield self._corner_pictures[index]
+            index += 1
+
+    def has_watermarks(self) -> bool:
+        """Check whether the deck contains at least one Gamma watermark."""
+        if self._removed:
+            raise RuntimeError(
+                "has_watermarks() called after remove() changed the deck"
+            )
+        if not self.package.mentions(self.detector.target_domain):
+            return False
+        return any(
+            self.detector.is_watermark(shape)
+            for _, shapes in self._iter_corner_pictures()
+            for shape in shapes
+        )
+
+    def detect(self) -> list[dict[str, object]]:
+        """Return the same results as PPTXWatermarkDetector.detect_watermarks."""
+        if self._removed:
+            raise RuntimeError("detect() called after remove() changed the deck")
+        package = self.package
+        results: list[dict[str, object]] = []
+        for part, shapes in self._iter_corner_pictures():
+            results.extend(
+                self.detector.check_shapes(
+                    shapes=shapes,
+                    slide_width=package.slide_width,
+                    slide_height=package.slide_height,
+                    location_type=part.location_type,
+                    location_name=part.location_name,
+                )
+            )
+        return results
+
+    def remove(self, output_path: str) -> dict[str, object]:
+        """
+        Remove watermarks and save the cleaned deck; may be called once.
+
+        Args:
+            output_path: Path to save the cleaned PPTX file
+
+        Returns:
+            The same dictionary as PPTXWatermarkRemover.remove_watermarks
+        """
+        if self._removed:
+            raise RuntimeError("remove() was already called on this session")
+        self._removed = True
+
+        package = self.package
+        result = self.remover.save_cleaned(
+            package,
+            (
+                (
+                    part,
+                    self.remover.find_watermark_shapes(
+                        shapes, package.slide_width, package.slide_height
+                    ),
+                )
+                for part, shapes in self._iter_corner_pictures()
+            ),
+            output_path,
+        )
+        if result["success"]:
+            logger.info(
+                "Removed %s watermarks -> %s", result["watermarks_removed"], output_path
+            )
+        return result
+
+
+@contextmanager
+def open_pptx(
+    source: PPTXSource,
+    target_domain: str = "gamma.app",
+    corner_threshold: float = 0.70,
+) -> Iterator[PPTXSession]:
+    """
+    Open a deck for detection and removal on a single parse.
+
+    Example:
+        with open_pptx("deck.pptx") as session:
+            if session.has_watermarks():
+                session.remove("deck_clean.pptx")
+    """
+    session = PPTXSession(source, target_domain, corner_threshold)
+    try:
+        yield session
+    finally:
+        session.close()
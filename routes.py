@@ -2,7 +2,7 @@
 
 from typing import Any
 
-from fastapi import APIRouter, File, Query, Request, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, Query, Request, UploadFile
 from fastapi.responses import (
     FileResponse,
     HTMLResponse,
@@ -17,9 +17,31 @@ from utils.upload_processing import process_api_upload, process_form_upload
 
 APP_VERSION = "2.5.0"
 OUTPUT_FOLDER = "outputs"
+# Output names embed a content digest, so a URL never changes content.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+# Templates only change on deploy: skip the per-render mtime check and keep
+# the compiled page around instead of looking it up for every response.
+templates.env.auto_reload = False
+index_template = templates.get_template("index.html")
+
+
+def render_index(
+    request: Request, status_code: int = 200, **context: Any
+) -> HTMLResponse:
+    """Render the single-page UI with the given template context."""
+    return HTMLResponse(
+        index_template.render(request=request, **context), status_code=status_code
+    )
+
+
+def render_error(
+    request: Request, error_message: str, status_code: int = 200
+) -> HTMLResponse:
+    """Render the single-page UI showing only an error message."""
+    return render_index(request, status_code=status_code, error_message=error_message)
 
 
 @router.get("/health")
@@ -31,16 +53,18 @@ async def health_check() -> dict[str, str]:
 @router.get("/", response_class=HTMLResponse)
 async def index(request: Request) -> object:
     """Serve the main application page."""
-    return templates.TemplateResponse(request, "index.html")
+    return render_index(request)
 
 
 @router.post("/remove_watermark")
 async def remove_watermark(
-    request: Request, pdf_file: UploadFile = File(...)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    pdf_file: UploadFile = File(...),
 ) -> object:
     """Remove watermarks from one uploaded file via the HTML form."""
-    context = await process_form_upload(pdf_file, OUTPUT_FOLDER)
-    return templates.TemplateResponse(request, "index.html", context)
+    context = await process_form_upload(pdf_file, OUTPUT_FOLDER, background_tasks)
+    return render_index(request, **context)
 
 
 @router.post("/api/remove_watermarks")
@@ -79,10 +103,14 @@ async def download_processed_file(filename: str) -> object:
     """Stream a processed output file back to the client."""
     resolved = resolve_output_file(filename, OUTPUT_FOLDER)
     if resolved is None:
-        return {"error": "File not found."}
+        return JSONResponse(status_code=404, content={"error": "File not found."})
 
-    safe_name, file_path = resolved
+    safe_name, file_path, file_stat = resolved
     extension = get_file_extension(safe_name)
     return FileResponse(
-        file_path, media_type=get_mime_type(extension), filename=safe_name
+        file_path,
+        media_type=get_mime_type(extension),
+        filename=safe_name,
+        stat_result=file_stat,
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
     )
@@ -1,113 +1,162 @@
 """Shape analysis for PPTX watermark detection."""
 
-from typing import Any, cast
+from typing import Any, NamedTuple, TextIO, cast
 
+from lxml import etree
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.oxml.ns import namespaces
 
-from .utils import emu_to_inches, get_shape_position_percentage, is_bottom_right_corner
+from .utils import (
+    PercentScale,
+    emu_to_inches,
+    is_bottom_right_corner,
+    position_percentages,
+)
+
+# Relationship ids of a shape-level click hyperlink (on its non-visual
+# properties) and of hyperlinks on the text runs of its text body.
+_CLICK_HYPERLINK_IDS = etree.XPath(
+    "*/p:cNvPr/a:hlinkClick/@r:id", namespaces=namespaces("a", "p", "r")
+)
+_TEXT_HYPERLINK_IDS = etree.XPath(
+    "p:txBody/a:p/a:r/a:rPr/a:hlinkClick/@r:id", namespaces=namespaces("a", "p", "r")
+)
+
+
+class ShapeReport(NamedTuple):
+    """What analyze_shape found, for callers that also track gamma shapes."""
+
+    hyperlinks: list[str]
+    in_corner: bool
+    gamma_in_text: bool
 
 
 def analyze_hyperlinks(shape: object) -> list[str]:
-    """Extract hyperlinks from a shape."""
+    """
+    Extract hyperlinks from a shape.
+
+    Text hyperlinks are read from the run XML instead of through
+    text_frame.paragraphs and run.hyperlink, which build a wrapper for every
+    paragraph and run and add an empty rPr to runs that have none.
+    """
     shape = cast(Any, shape)
+    element = shape._element
     hyperlinks = []
 
     # Check if the shape itself has a click action (hyperlink)
-    if hasattr(shape, "click_action") and shape.click_action:
-        action = shape.click_action
-        if hasattr(action, "hyperlink") and action.hyperlink:
-            hyperlinks.append(f"Click action: {action.hyperlink.address}")
+    for r_id in _CLICK_HYPERLINK_IDS(element):
+        address = shape.part.target_ref(r_id) if r_id else None
+        hyperlinks.append(f"Click action: {address}")
 
-    # Check for hyperlinks in text frames
-    if hasattr(shape, "text_frame"):
-        try:
-            for paragraph in shape.text_frame.paragraphs:
-                for run in paragraph.runs:
-                    if hasattr(run, "hyperlink") and run.hyperlink:
-                        if run.hyperlink.address:
-                            hyperlinks.append(
-                                f"Text hyperlink: {run.hyperlink.address}"
-                            )
-        except Exception:
-            pass
+    # Check for hyperlinks on text runs
+    for r_id in _TEXT_HYPERLINK_IDS(element):
+        if r_id:
+            hyperlinks.append(f"Text hyperlink: {shape.part.target_ref(r_id)}")
 
     return hyperlinks
 
 
 def analyze_shape(
-    shape: object, slide_width: int, slide_height: int, indent: int = 0
-) -> list[str]:
-    """Analyze a single shape and return details."""
+    shape: object, scale: PercentScale, out: TextIO, indent: int = 0
+) -> ShapeReport:
+    """
+    Analyze a shape and any grouped shapes inside it, writing to out.
+
+    Groups are walked with an explicit stack in the same pre-order a
+    recursive walk would use, so deep nesting does not hit the recursion
+    limit. The report describes the outer shape only.
+    """
+    report = _describe_shape(shape, scale, out, indent)
+    stack = _group_children(shape, indent + 1)
+    while stack:
+        subshape, subindent = stack.pop()
+        _describe_shape(subshape, scale, out, subindent)
+        stack.extend(_group_children(subshape, subindent + 1))
+    return report
+
+
+def _group_children(shape: object, indent: int) -> list[tuple[Any, int]]:
+    """Shapes inside a group, reversed so popping them keeps document order."""
     shape = cast(Any, shape)
-    prefix = "  " * indent
-    result = []
+    if shape.shape_type != MSO_SHAPE_TYPE.GROUP:
+        return []
+    return [(subshape, indent) for subshape in reversed(list(shape.shapes))]
 
-    # Get shape type
-    shape_type = str(shape.shape_type) if hasattr(shape, "shape_type") else "Unknown"
 
-    # Get position
-    left = shape.left if shape.left is not None else 0
-    top = shape.top if shape.top is not None else 0
-    width = shape.width if shape.width is not None else 0
-    height = shape.height if shape.height is not None else 0
+def _describe_shape(
+    shape: object, scale: PercentScale, out: TextIO, indent: int
+) -> ShapeReport:
+    """Write the details of one shape, without descending into groups."""
+    shape = cast(Any, shape)
+    prefix = "  " * indent
 
-    left_pct, top_pct, right_pct, bottom_pct = get_shape_position_percentage(
-        shape, slide_width, slide_height
-    )
+    # python-pptx properties re-read the XML on every access, so read each
+    # attribute once and reuse the locals below
+    shape_type = shape.shape_type
+    text = getattr(shape, "text", "")
+    raw_left, raw_top = shape.left, shape.top
+    left = raw_left if raw_left is not None else 0
+    top = raw_top if raw_top is not None else 0
+    width = shape.width or 0
+    height = shape.height or 0
+
+    if raw_left is None or raw_top is None:
+        left_pct = top_pct = right_pct = bottom_pct = None
+    else:
+        left_pct, top_pct, right_pct, bottom_pct = position_percentages(
+            left, top, width, height, scale
+        )
 
-    result.append(f"{prefix}Shape: {shape.name}")
-    result.append(f"{prefix}  Type: {shape_type}")
-    result.append(
+    out.write(
+        f"{prefix}Shape: {shape.name}\n"
+        f"{prefix}  Type: {shape_type}\n"
         f"{prefix}  Position (EMUs): left={left}, top={top}, "
-        f"width={width}, height={height}"
-    )
-    result.append(
+        f"width={width}, height={height}\n"
         f'{prefix}  Position (inches): left={emu_to_inches(left):.2f}", '
         f'top={emu_to_inches(top):.2f}", width={emu_to_inches(width):.2f}", '
-        f'height={emu_to_inches(height):.2f}"'
+        f'height={emu_to_inches(height):.2f}"\n'
     )
 
     if left_pct is not None:
-        result.append(
+        out.write(
             f"{prefix}  Position (%): left={left_pct:.1f}%, top={top_pct:.1f}%, "
-            f"right={right_pct:.1f}%, bottom={bottom_pct:.1f}%"
+            f"right={right_pct:.1f}%, bottom={bottom_pct:.1f}%\n"
         )
 
     # Check if in bottom-right corner
-    if is_bottom_right_corner(shape, slide_width, slide_height, 70):
-        result.append(f"{prefix}  *** BOTTOM-RIGHT CORNER (>70%) ***")
+    in_corner = is_bottom_right_corner(left_pct, top_pct, 70)
+    if in_corner:
+        out.write(f"{prefix}  *** BOTTOM-RIGHT CORNER (>70%) ***\n")
 
     # Get text content
-    if hasattr(shape, "text") and shape.text:
-        text = shape.text[:100] + "..." if len(shape.text) > 100 else shape.text
-        result.append(f"{prefix}  Text: '{text}'")
-        if "gamma" in shape.text.lower():
-            result.append(f"{prefix}  *** CONTAINS 'GAMMA' IN TEXT ***")
+    gamma_in_text = False
+    if text:
+        shown = text[:100] + "..." if len(text) > 100 else text
+        out.write(f"{prefix}  Text: '{shown}'\n")
+        gamma_in_text = "gamma" in text.lower()
+        if gamma_in_text:
+            out.write(f"{prefix}  *** CONTAINS 'GAMMA' IN TEXT ***\n")
 
     # Get hyperlinks
     hyperlinks = analyze_hyperlinks(shape)
     if hyperlinks:
         for link in hyperlinks:
-            result.append(f"{prefix}  Hyperlink: {link}")
+            out.write(f"{prefix}  Hyperlink: {link}\n")
             if "gamma" in link.lower():
-                result.append(f"{prefix}  *** CONTAINS 'GAMMA' IN HYPERLINK ***")
+                out.write(f"{prefix}  *** CONTAINS 'GAMMA' IN HYPERLINK ***\n")
 
     # Check for image
-    if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-        result.append(f"{prefix}  *** THIS IS AN IMAGE ***")
+    if shape_type == MSO_SHAPE_TYPE.PICTURE:
+        out.write(f"{prefix}  *** THIS IS AN IMAGE ***\n")
         try:
             if hasattr(shape, "image"):
-                result.append(f"{prefix}  Image format: {shape.image.content_type}")
-                result.append(f"{prefix}  Image size: {len(shape.image.blob)} bytes")
+                out.write(f"{prefix}  Image format: {shape.image.content_type}\n")
+                out.write(f"{prefix}  Image size: {len(shape.image.blob)} bytes\n")
         except Exception as e:
-            result.append(f"{prefix}  Image info error: {e}")
+            out.write(f"{prefix}  Image info error: {e}\n")
 
     # Handle group shapes
-    if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-        result.append(f"{prefix}  *** THIS IS A GROUP SHAPE ***")
-        for subshape in shape.shapes:
-            result.extend(
-                analyze_shape(subshape, slide_width, slide_height, indent + 1)
-            )
-
-    return result
+    if shape_type == MSO_SHAPE_TYPE.GROUP:
+        out.write(f"{prefix}  *** THIS IS A GROUP SHAPE ***\n")
+
+    return ShapeReport(hyperlinks, in_corner, gamma_in_text)
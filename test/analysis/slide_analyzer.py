@@ -1,52 +1,41 @@
 """Slide and master analysis for PPTX files."""
 
-from typing import Any, cast
+import io
+from typing import Any, TextIO, cast
 
 from .shape_analyzer import analyze_shape
-from .utils import emu_to_inches
+from .utils import PercentScale, emu_to_inches
 
 
-def analyze_slide_layout(
-    layout: object, slide_width: int, slide_height: int
-) -> list[str]:
-    """Analyze a slide layout."""
+def analyze_slide_layout(layout: object, scale: PercentScale, out: TextIO) -> None:
+    """Analyze a slide layout, writing the report to out."""
     layout = cast(Any, layout)
-    result = []
-    result.append(f"\n  Layout: {layout.name}")
+    out.write(f"\n  Layout: {layout.name}\n")
 
     for shape in layout.shapes:
-        result.extend(analyze_shape(shape, slide_width, slide_height, indent=2))
+        analyze_shape(shape, scale, out, indent=2)
 
-    return result
 
-
-def analyze_slide_master(
-    master: object, slide_width: int, slide_height: int
-) -> list[str]:
-    """Analyze a slide master."""
+def analyze_slide_master(master: object, scale: PercentScale, out: TextIO) -> None:
+    """Analyze a slide master and its layouts, writing the report to out."""
     master = cast(Any, master)
-    result = []
-    result.append(
-        f"\nSlide Master: {master.name if hasattr(master, 'name') else 'Unnamed'}"
+    out.write(
+        f"\nSlide Master: {master.name if hasattr(master, 'name') else 'Unnamed'}\n"
     )
 
     # Analyze shapes on the master
     for shape in master.shapes:
-        result.extend(analyze_shape(shape, slide_width, slide_height, indent=1))
+        analyze_shape(shape, scale, out, indent=1)
 
     # Analyze layouts
-    result.append("\n  Slide Layouts:")
+    out.write("\n  Slide Layouts:\n")
     for layout in master.slide_layouts:
-        result.extend(analyze_slide_layout(layout, slide_width, slide_height))
-
-    return result
+        analyze_slide_layout(layout, scale, out)
 
 
-def analyze_slides(prs: object) -> list[tuple[str, Any, str]]:
+def analyze_slides(prs: object, scale: PercentScale) -> list[tuple[str, Any, str]]:
     """Analyze all slides in a presentation."""
     prs = cast(Any, prs)
-    slide_width = int(prs.slide_width or 0)
-    slide_height = int(prs.slide_height or 0)
     gamma_shapes = []
 
     print("\n" + "=" * 80)
@@ -54,31 +43,31 @@ def analyze_slides(prs: object) -> list[tuple[str, Any, str]]:
     print("=" * 80)
 
     for i, slide in enumerate(prs.slides):
-        print(f"\n--- Slide {i + 1} ---")
-        print(f"Slide layout: {slide.slide_layout.name}")
-        print(f"Number of shapes: {len(slide.shapes)}")
+        # One buffer and one print per slide
+        buffer = io.StringIO()
+        buffer.write(
+            f"\n--- Slide {i + 1} ---\n"
+            f"Slide layout: {slide.slide_layout.name}\n"
+            f"Number of shapes: {len(slide.shapes)}\n"
+        )
 
         for shape in slide.shapes:
-            from .shape_analyzer import analyze_hyperlinks
-            from .utils import is_bottom_right_corner
-
-            lines = analyze_shape(shape, slide_width, slide_height, indent=0)
-            for line in lines:
-                print(line)
+            report = analyze_shape(shape, scale, buffer, indent=0)
 
             # Track gamma-related shapes
-            if hasattr(shape, "text") and "gamma" in shape.text.lower():
+            if report.gamma_in_text:
                 gamma_shapes.append((f"Slide {i + 1}", shape, "text"))
 
-            hyperlinks = analyze_hyperlinks(shape)
-            for link in hyperlinks:
+            for link in report.hyperlinks:
                 if "gamma" in link.lower():
                     gamma_shapes.append((f"Slide {i + 1}", shape, f"hyperlink: {link}"))
 
             # Check if in corner
-            if is_bottom_right_corner(shape, slide_width, slide_height, 70):
+            if report.in_corner:
                 gamma_shapes.append((f"Slide {i + 1}", shape, "corner position"))
 
+        print(buffer.getvalue(), end="")
+
     return gamma_shapes
 
 
@@ -1,6 +1,13 @@
 """Utility functions for PPTX analysis."""
 
-from typing import Any, cast
+from typing import Any, NamedTuple, cast
+
+
+class PercentScale(NamedTuple):
+    """Factors turning EMU offsets into percentages of the slide size."""
+
+    x: float
+    y: float
 
 
 def emu_to_inches(emu: int) -> float:
@@ -8,33 +15,37 @@ def emu_to_inches(emu: int) -> float:
     return emu / 914400
 
 
+def percent_scale(slide_width: int, slide_height: int) -> PercentScale:
+    """Compute once per presentation so positions are multiplied, not divided."""
+    return PercentScale(100.0 / slide_width, 100.0 / slide_height)
+
+
+def position_percentages(
+    left: int, top: int, width: int, height: int, scale: PercentScale
+) -> tuple[float, float, float, float]:
+    """Calculate left/top/right/bottom edges as percentages of the slide."""
+    left_pct = left * scale.x
+    top_pct = top * scale.y
+    right_pct = (left + width) * scale.x if width else left_pct
+    bottom_pct = (top + height) * scale.y if height else top_pct
+    return left_pct, top_pct, right_pct, bottom_pct
+
+
 def get_shape_position_percentage(
-    shape: object, slide_width: int, slide_height: int
+    shape: object, scale: PercentScale
 ) -> tuple[float | None, float | None, float | None, float | None]:
     """Calculate shape position as percentage of slide dimensions."""
     shape = cast(Any, shape)
-    if shape.left is None or shape.top is None:
+    left, top = shape.left, shape.top
+    if left is None or top is None:
         return None, None, None, None
-
-    left_pct = (shape.left / slide_width) * 100
-    top_pct = (shape.top / slide_height) * 100
-    right_pct = (
-        ((shape.left + shape.width) / slide_width) * 100 if shape.width else left_pct
-    )
-    bottom_pct = (
-        ((shape.top + shape.height) / slide_height) * 100 if shape.height else top_pct
-    )
-
-    return left_pct, top_pct, right_pct, bottom_pct
+    return position_percentages(left, top, shape.width or 0, shape.height or 0, scale)
 
 
 def is_bottom_right_corner(
-    shape: object, slide_width: int, slide_height: int, threshold: int = 70
+    left_pct: float | None, top_pct: float | None, threshold: int = 70
 ) -> bool:
-    """Check if shape is in bottom-right corner (>threshold% of dimensions)."""
-    left_pct, top_pct, right_pct, bottom_pct = get_shape_position_percentage(
-        shape, slide_width, slide_height
-    )
+    """Check if a position is in the bottom-right corner (>threshold% of dimensions)."""
     if left_pct is None or top_pct is None:
         return False
     return left_pct >= threshold and top_pct >= threshold
@@ -1,138 +1,213 @@
 """XML structure analysis for PPTX files."""
 
 import os
-import xml.etree.ElementTree as ET
+import posixpath
 import zipfile
+from collections.abc import Iterator
+from typing import IO
+
+from lxml import etree
+
+_RELATIONSHIP_TAG = (
+    "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+)
+
+# Do not expand entities from the deck being inspected.
+_XML_PARSER = etree.XMLParser(resolve_entities=False)
+
+# Hyperlink elements and elements whose text mentions gamma, in document
+# order, so libxml2 does the scan and Python only sees the matches.
+_SLIDE_MATCHES = etree.XPath(
+    "//*[contains(translate(local-name(), 'HLINK', 'hlink'), 'hlink')"
+    " or contains(translate(text(), 'GAM', 'gam'), 'gamma')]"
+)
+
+# Slide, layout and master parts stay well under a megabyte; a larger XML
+# member is not read whole into memory for the gamma search.
+MAX_SEARCH_BYTES = 10 * 1024 * 1024
+
+
+def _iter_elements(
+    source: IO[bytes], tag: str | None = None
+) -> Iterator[etree._Element]:
+    """
+    Stream the elements of an XML file in document end order.
+
+    Each element is cleared once the caller is done with it, together with
+    its already-visited siblings, so only the current path stays in memory.
+    Entities from the deck being inspected are not expanded.
+
+    ZIP member streams are passed as they are: iterparse reads them in large
+    chunks and ZipExtFile inflates per read, so an extra BufferedReader
+    around them measured no faster.
+    """
+    for _, elem in etree.iterparse(
+        source, events=("end",), tag=tag, resolve_entities=False
+    ):
+        yield elem
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
 
 
 def extract_and_analyze_xml(pptx_path: str) -> list[str]:
-    """Extract PPTX as ZIP and analyze XML structure."""
+    """Open PPTX as ZIP and analyze XML structure, reading members in place."""
     result = []
     result.append("\n" + "=" * 80)
     result.append("XML STRUCTURE ANALYSIS")
     result.append("=" * 80)
 
-    # Create extraction directory
-    extract_dir = "pptx_extracted"
-
-    # Unzip the PPTX
     with zipfile.ZipFile(pptx_path, "r") as zip_ref:
-        zip_ref.extractall(extract_dir)
-
-    result.append(f"\nExtracted to: {extract_dir}")
-    result.append("\nDirectory structure:")
+        # Sort the member names into buckets in one pass over the archive
+        names = []
+        markup_infos = []
+        slide_names = []
+        rels_names = []
+        for info in zip_ref.infolist():
+            name = info.filename
+            if name.endswith("/"):
+                continue
+            names.append(name)
+            if name.endswith(".rels"):
+                markup_infos.append(info)
+                rels_names.append(name)
+            elif name.endswith(".xml"):
+                markup_infos.append(info)
+                if name.startswith("ppt/slides/") and name.count("/") == 2:
+                    slide_names.append(name)
+
+        result.append(f"\nArchive: {pptx_path}")
+        result.append("\nDirectory structure:")
+        result.extend(_directory_tree(os.path.basename(pptx_path), names))
+
+        # Look for gamma-related content in XML files
+        result.extend(_search_gamma_in_xml(zip_ref, markup_infos))
+
+        # Analyze slide XML files for shape details
+        result.extend(_analyze_slide_xml(zip_ref, slide_names))
+
+        # Check relationships files for hyperlinks
+        result.extend(_analyze_relationships(zip_ref, rels_names))
 
-    for root, dirs, files in os.walk(extract_dir):
-        level = root.replace(extract_dir, "").count(os.sep)
-        indent = "  " * level
-        result.append(f"{indent}{os.path.basename(root)}/")
-        subindent = "  " * (level + 1)
-        for file in files:
-            result.append(f"{subindent}{file}")
-
-    # Look for gamma-related content in XML files
-    result.extend(_search_gamma_in_xml(extract_dir))
+    return result
 
-    # Analyze slide XML files for shape details
-    result.extend(_analyze_slide_xml(extract_dir))
 
-    # Check relationships files for hyperlinks
-    result.extend(_analyze_relationships(extract_dir))
+def _directory_tree(root_label: str, names: list[str]) -> list[str]:
+    """List ZIP member names as an indented directory tree."""
+    directories: dict[str, list[str]] = {"": []}
+    for name in names:
+        directory, filename = posixpath.split(name)
+        directories.setdefault(directory, []).append(filename)
+        # Directories that only hold subdirectories have no entry of their own
+        while directory:
+            directory = posixpath.dirname(directory)
+            directories.setdefault(directory, [])
 
+    result = []
+    for directory in sorted(directories, key=lambda d: d.split("/") if d else []):
+        level = directory.count("/") + 1 if directory else 0
+        label = posixpath.basename(directory) if directory else root_label
+        result.append(f"{'  ' * level}{label}/")
+        subindent = "  " * (level + 1)
+        for filename in directories[directory]:
+            result.append(f"{subindent}{filename}")
     return result
 
 
-def _search_gamma_in_xml(extract_dir: str) -> list[str]:
-    """Search for 'gamma' in XML files."""
+def _search_gamma_in_xml(
+    zip_ref: zipfile.ZipFile, infos: list[zipfile.ZipInfo]
+) -> list[str]:
+    """Search for 'gamma' in the given XML and relationships members."""
     result = []
     result.append("\n" + "-" * 40)
     result.append("SEARCHING FOR 'GAMMA' IN XML FILES:")
     result.append("-" * 40)
 
-    for root, dirs, files in os.walk(extract_dir):
-        for file in files:
-            if file.endswith(".xml") or file.endswith(".rels"):
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, encoding="utf-8") as f:
-                        content = f.read()
-                        if "gamma" in content.lower():
-                            result.append(f"\n*** FOUND 'gamma' in: {filepath} ***")
-                            # Find the lines containing gamma
-                            for i, line in enumerate(content.split("\n")):
-                                if "gamma" in line.lower():
-                                    result.append(f"  Line {i + 1}: {line[:200]}...")
-                except Exception:
-                    pass
+    for info in infos:
+        name = info.filename
+        if info.file_size > MAX_SEARCH_BYTES:
+            result.append(f"\nSkipped {name}: {info.file_size} bytes uncompressed")
+            continue
+        data = zip_ref.read(info)
+        lowered = data.lower()
+        index = lowered.find(b"gamma")
+        if index < 0:
+            continue
+        result.append(f"\n*** FOUND 'gamma' in: {name} ***")
+
+        # Report each line containing gamma without splitting the whole file
+        line_number = 1
+        line_start = 0
+        while index >= 0:
+            line_number += lowered.count(b"\n", line_start, index)
+            line_start = lowered.rfind(b"\n", 0, index) + 1
+            line_end = lowered.find(b"\n", index)
+            if line_end < 0:
+                line_end = len(data)
+            line = data[line_start:line_end].decode("utf-8", "replace")
+            result.append(f"  Line {line_number}: {line[:200]}...")
+            index = lowered.find(b"gamma", line_end)
 
     return result
 
 
-def _analyze_slide_xml(extract_dir: str) -> list[str]:
-    """Analyze slide XML files for shape details."""
+def _analyze_slide_xml(zip_ref: zipfile.ZipFile, names: list[str]) -> list[str]:
+    """Analyze the named slide XML files for shape details."""
     result = []
     result.append("\n" + "-" * 40)
     result.append("ANALYZING SLIDE XML STRUCTURE:")
     result.append("-" * 40)
 
-    slides_dir = os.path.join(extract_dir, "ppt", "slides")
-    if os.path.exists(slides_dir):
-        for slide_file in sorted(os.listdir(slides_dir)):
-            if slide_file.endswith(".xml"):
-                filepath = os.path.join(slides_dir, slide_file)
-                result.append(f"\n{slide_file}:")
-                try:
-                    tree = ET.parse(filepath)
-                    root_elem = tree.getroot()
-
-                    # Find all shapes with hyperlinks
-                    for elem in root_elem.iter():
-                        if "hlinkClick" in elem.tag or "hlink" in elem.tag.lower():
-                            result.append(f"  Hyperlink element: {elem.tag}")
-                            result.append(f"    Attributes: {elem.attrib}")
-                        if elem.text and "gamma" in str(elem.text).lower():
-                            result.append(f"  Text containing 'gamma': {elem.text}")
-
-                except Exception as e:
-                    result.append(f"  Error parsing: {e}")
+    for name in sorted(names, key=posixpath.basename):
+        result.append(f"\n{posixpath.basename(name)}:")
+        try:
+            with zip_ref.open(name) as xml_file:
+                tree = etree.parse(xml_file, _XML_PARSER)
+
+            # Find all shapes with hyperlinks
+            for elem in _SLIDE_MATCHES(tree):
+                tag = elem.tag
+                if "hlink" in tag.rpartition("}")[2].lower():
+                    result.append(f"  Hyperlink element: {tag}")
+                    result.append(f"    Attributes: {elem.attrib}")
+                text = elem.text
+                if text and "gamma" in text.lower():
+                    result.append(f"  Text containing 'gamma': {text}")
+
+        except Exception as e:
+            result.append(f"  Error parsing: {e}")
 
     return result
 
 
-def _analyze_relationships(extract_dir: str) -> list[str]:
-    """Analyze relationships files for hyperlinks."""
+def _analyze_relationships(zip_ref: zipfile.ZipFile, names: list[str]) -> list[str]:
+    """Analyze the named relationships files for hyperlinks."""
     result = []
     result.append("\n" + "-" * 40)
     result.append("ANALYZING RELATIONSHIPS FILES:")
     result.append("-" * 40)
 
-    rels_paths = []
-    for root, dirs, files in os.walk(extract_dir):
-        for file in files:
-            if file.endswith(".rels"):
-                rels_paths.append(os.path.join(root, file))
-
-    for rels_path in rels_paths:
+    for rels_name in names:
         try:
-            tree = ET.parse(rels_path)
-            root_elem = tree.getroot()
             has_external = False
-
-            for rel in root_elem:
-                target = rel.get("Target", "")
-                rel_type = rel.get("Type", "")
-                target_mode = rel.get("TargetMode", "")
-
-                if "gamma" in target.lower() or target_mode == "External":
-                    if not has_external:
-                        result.append(f"\n{rels_path}:")
-                        has_external = True
-                    result.append(
-                        f"  Relationship: Type={rel_type.split('/')[-1]}, "
-                        f"Target={target}, Mode={target_mode}"
-                    )
-                    if "gamma" in target.lower():
-                        result.append("    *** GAMMA HYPERLINK FOUND ***")
+            with zip_ref.open(rels_name) as rels_file:
+                for rel in _iter_elements(rels_file, _RELATIONSHIP_TAG):
+                    target = rel.get("Target", "")
+                    rel_type = rel.get("Type", "")
+                    target_mode = rel.get("TargetMode", "")
+
+                    if "gamma" in target.lower() or target_mode == "External":
+                        if not has_external:
+                            result.append(f"\n{rels_name}:")
+                            has_external = True
+                        result.append(
+                            f"  Relationship: Type={rel_type.split('/')[-1]}, "
+                            f"Target={target}, Mode={target_mode}"
+                        )
+                        if "gamma" in target.lower():
+                            result.append("    *** GAMMA HYPERLINK FOUND ***")
         except Exception:
             pass
 
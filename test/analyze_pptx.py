@@ -3,14 +3,14 @@
 
 import io
 import sys
-from typing import Any, cast
+from typing import Any
 
 from analysis.slide_analyzer import (
     analyze_slide_master,
     analyze_slides,
     print_slide_dimensions,
 )
-from analysis.utils import get_shape_position_percentage
+from analysis.utils import PercentScale, get_shape_position_percentage, percent_scale
 from analysis.xml_analyzer import extract_and_analyze_xml
 from pptx import Presentation
 
@@ -21,10 +21,9 @@ PPTX_FILE = r"Sample\Your-Tenant-Just-Sent-You-This-Photo.pptx"
 
 
 def print_watermark_summary(
-    gamma_shapes: list[tuple[str, Any, str]], prs: object
+    gamma_shapes: list[tuple[str, Any, str]], scale: PercentScale
 ) -> None:
     """Print summary of detected watermarks."""
-    prs = cast(Any, prs)
     print("\n" + "=" * 80)
     print("WATERMARK DETECTION SUMMARY")
     print("=" * 80)
@@ -33,12 +32,10 @@ def print_watermark_summary(
         print("\nPotential watermark shapes found:")
         for location, shape, reason in gamma_shapes:
             print(f"  - {location}: '{shape.name}' ({reason})")
-            if shape.left is not None:
-                left_pct, top_pct, right_pct, bottom_pct = (
-                    get_shape_position_percentage(
-                        shape, int(prs.slide_width or 0), int(prs.slide_height or 0)
-                    )
-                )
+            left_pct, top_pct, right_pct, bottom_pct = get_shape_position_percentage(
+                shape, scale
+            )
+            if left_pct is not None:
                 print(
                     f"    Position: {left_pct:.1f}%-{right_pct:.1f}% horizontal, "
                     f"{top_pct:.1f}%-{bottom_pct:.1f}% vertical"
@@ -59,29 +56,27 @@ def main() -> None:
 
     # Print slide dimensions
     print_slide_dimensions(prs)
+    scale = percent_scale(int(prs.slide_width or 0), int(prs.slide_height or 0))
 
     # Analyze slides
-    gamma_shapes = analyze_slides(prs)
+    gamma_shapes = analyze_slides(prs, scale)
 
     # Analyze slide masters
     print("\n" + "=" * 80)
     print("SLIDE MASTER ANALYSIS")
     print("=" * 80)
 
+    buffer = io.StringIO()
     for master in prs.slide_masters:
-        lines = analyze_slide_master(
-            master, int(prs.slide_width or 0), int(prs.slide_height or 0)
-        )
-        for line in lines:
-            print(line)
+        analyze_slide_master(master, scale, buffer)
+    print(buffer.getvalue(), end="")
 
     # Extract and analyze XML
     xml_results = extract_and_analyze_xml(PPTX_FILE)
-    for line in xml_results:
-        print(line)
+    sys.stdout.write("\n".join(xml_results) + "\n")
 
     # Print summary
-    print_watermark_summary(gamma_shapes, prs)
+    print_watermark_summary(gamma_shapes, scale)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+"""Shared builders for the processor tests."""
+
+import io
+
+from PIL import Image
+
+GAMMA_URL = "https://gamma.app/?utm_source=made-with-gamma"
+
+
+def badge_png() -> bytes:
+    """Return a small white PNG standing in for the Gamma badge."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 10), (255, 255, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
@@ -0,0 +1,47 @@
+"""
+Pytest tests for processed-output download helpers.
+
+Run with:  pytest test/test_download_helpers.py -v
+"""
+
+from pathlib import Path
+
+from utils import download_helpers
+from utils.download_helpers import register_output, resolve_output_file
+
+
+def test_resolve_output_file_returns_stat(tmp_path: Path) -> None:
+    """Existing outputs resolve to their real path and stat result."""
+    (tmp_path / "processed_deck.pdf").write_bytes(b"%PDF-clean")
+
+    resolved = resolve_output_file("processed_deck.pdf", str(tmp_path))
+
+    assert resolved is not None
+    safe_name, file_path, file_stat = resolved
+    assert safe_name == "processed_deck.pdf"
+    assert file_path == str((tmp_path / "processed_deck.pdf").resolve())
+    assert file_stat.st_size == len(b"%PDF-clean")
+
+
+def test_resolve_output_file_rejects_missing_and_traversal(tmp_path: Path) -> None:
+    """Unknown names, directories and traversal attempts are not served."""
+    (tmp_path / "subdir").mkdir()
+
+    assert resolve_output_file("missing.pdf", str(tmp_path)) is None
+    assert resolve_output_file("subdir", str(tmp_path)) is None
+    assert resolve_output_file("../../etc/passwd", str(tmp_path)) is None
+    assert resolve_output_file("..", str(tmp_path)) is None
+
+
+def test_registered_output_dropped_once_deleted(tmp_path: Path) -> None:
+    """Registered outputs resolve directly and are forgotten once missing."""
+    output = tmp_path / "processed_deck.pdf"
+    output.write_bytes(b"%PDF-clean")
+    register_output(str(tmp_path), "processed_deck.pdf")
+
+    assert resolve_output_file("processed_deck.pdf", str(tmp_path)) is not None
+
+    output.unlink()
+
+    assert resolve_output_file("processed_deck.pdf", str(tmp_path)) is None
+    assert str(output.resolve()) not in download_helpers._generated_outputs
@@ -0,0 +1,91 @@
+"""
+Pytest tests for PDF watermark detection and removal.
+
+Run with:  pytest test/test_pdf_removal.py -v
+"""
+
+from pathlib import Path
+
+import fitz
+from helpers import GAMMA_URL, badge_png
+
+from processors.pdf.detector import WatermarkDetector
+from processors.pdf.remover import WatermarkRemover
+from utils.processors import PDFProcessor
+
+
+def _create_mock_pdf(path: str, pages: int = 3, watermarked: tuple = (0, 2)) -> None:
+    """Create a PDF with a linked bottom-right badge on the given pages."""
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"Slide {page_num + 1}")
+        if page_num in watermarked:
+            rect = fitz.Rect(480, 740, 600, 780)
+            page.insert_image(rect, stream=badge_png())
+            page.insert_link({"kind": fitz.LINK_URI, "from": rect, "uri": GAMMA_URL})
+    document.save(path)
+    document.close()
+
+
+def test_pdf_processor_removes_watermarks(tmp_path: Path) -> None:
+    """PDFProcessor.process() should strip every badge image and link."""
+    input_pdf = tmp_path / "input.pdf"
+    output_pdf = tmp_path / "output.pdf"
+    _create_mock_pdf(str(input_pdf))
+
+    result = PDFProcessor().process(str(input_pdf), str(output_pdf), "input.pdf")
+
+    assert result["success"] is True, f"Processing failed: {result.get('error')}"
+    assert result["has_watermark"] is True
+    assert result["stats"]["images_removed"] == 2
+    assert result["stats"]["links_removed"] == 2
+    remaining, error = WatermarkDetector().identify_watermarks(str(output_pdf))
+    assert error is None
+    assert remaining == []
+
+
+def test_pdf_processor_clean_file(tmp_path: Path) -> None:
+    """A PDF without Gamma elements should be reported as clean."""
+    input_pdf = tmp_path / "clean.pdf"
+    _create_mock_pdf(str(input_pdf), watermarked=())
+
+    result = PDFProcessor().process(
+        str(input_pdf), str(tmp_path / "output.pdf"), "clean.pdf"
+    )
+
+    assert result["success"] is True
+    assert result["has_watermark"] is False
+    assert not (tmp_path / "output.pdf").exists()
+
+
+def test_remover_uses_detector_results(tmp_path: Path) -> None:
+    """Passing detector results should give the same counts as a full scan."""
+    input_pdf = tmp_path / "input.pdf"
+    _create_mock_pdf(str(input_pdf), pages=5, watermarked=(3,))
+    elements, _ = WatermarkDetector().identify_watermarks(str(input_pdf))
+
+    remover = WatermarkRemover()
+    full_scan = remover.clean_pdf_from_target_domain(
+        str(input_pdf), str(tmp_path / "full.pdf")
+    )
+    targeted = remover.clean_pdf_from_target_domain(
+        str(input_pdf), str(tmp_path / "targeted.pdf"), elements
+    )
+
+    assert targeted == full_scan == (1, 1)
+
+
+def test_pdf_processor_accepts_bytes(tmp_path: Path) -> None:
+    """In-memory uploads are processed without a temp file."""
+    input_pdf = tmp_path / "input.pdf"
+    output_pdf = tmp_path / "output.pdf"
+    _create_mock_pdf(str(input_pdf))
+
+    result = PDFProcessor().process(
+        input_pdf.read_bytes(), str(output_pdf), "input.pdf"
+    )
+
+    assert result["success"] is True
+    assert result["stats"]["total_removed"] == 4
+    assert output_pdf.exists()
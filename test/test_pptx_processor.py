@@ -0,0 +1,320 @@
+"""
+Pytest tests for PPTX watermark detection and removal.
+
+Run with:  pytest test/test_pptx_processor.py -v
+"""
+
+import io
+import zipfile
+from contextlib import closing
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+from helpers import GAMMA_URL, badge_png
+from pptx import Presentation
+
+import processors.pptx.package as package_module
+from processors.pptx.detector import PPTXWatermarkDetector
+from processors.pptx.package import PPTXPackage
+from processors.pptx.remover import PPTXWatermarkRemover
+from processors.pptx.session import open_pptx
+from utils.processors import PPTXProcessor
+
+
+def _create_mock_pptx(path: str, link: str | None = GAMMA_URL) -> None:
+    """Create a two-slide deck with a bottom-right badge in one slide layout."""
+    prs = Presentation()
+    slide_width = int(prs.slide_width or 0)
+    slide_height = int(prs.slide_height or 0)
+    layout = cast(Any, prs.slide_layouts[1])
+
+    # Layout shape trees have no add_picture(); build the <p:pic> directly.
+    _, r_id = layout.part.get_or_add_image_part(io.BytesIO(badge_png()))
+    pic_element = layout.shapes._spTree.add_pic(
+        99,
+        "Made with Gamma",
+        "",
+        r_id,
+        int(slide_width * 0.86),
+        int(slide_height * 0.92),
+        1500000,
+        400000,
+    )
+    if link:
+        picture = layout.shapes._shape_factory(pic_element)
+        picture.click_action.hyperlink.address = link
+
+    prs.slides.add_slide(layout)
+    prs.slides.add_slide(prs.slide_layouts[0])
+    prs.save(path)
+
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream without seek(), so zipfile adds data descriptors."""
+
+    def __init__(self, target: io.BytesIO) -> None:
+        self.target = target
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        return self.target.write(data)
+
+
+def _watermark_count(path: str) -> int:
+    """Count confirmed watermarks reported by the detector."""
+    results = PPTXWatermarkDetector().detect_watermarks(path)
+    return sum(1 for item in results if item["is_watermark"])
+
+
+def test_pptx_processor_removes_layout_watermark(tmp_path: Path) -> None:
+    """PPTXProcessor.process() should remove the linked layout badge."""
+    input_pptx = tmp_path / "input.pptx"
+    output_pptx = tmp_path / "output.pptx"
+    _create_mock_pptx(str(input_pptx))
+    assert _watermark_count(str(input_pptx)) == 1
+
+    result = PPTXProcessor().process(str(input_pptx), str(output_pptx), "input.pptx")
+
+    assert result["success"] is True, f"Processing failed: {result.get('error')}"
+    assert result["has_watermark"] is True
+    assert result["stats"]["watermarks_removed"] == 1
+    assert result["stats"]["layouts_cleaned"] == 1
+    assert result["stats"]["slides_cleaned"] == 2
+    assert _watermark_count(str(output_pptx)) == 0
+    assert len(Presentation(str(output_pptx)).slides) == 2
+
+
+def test_pptx_processor_clean_file(tmp_path: Path) -> None:
+    """A corner picture without a Gamma link is not reported as a watermark."""
+    input_pptx = tmp_path / "clean.pptx"
+    _create_mock_pptx(str(input_pptx), link=None)
+
+    result = PPTXProcessor().process(
+        str(input_pptx), str(tmp_path / "output.pptx"), "clean.pptx"
+    )
+
+    assert result["success"] is True
+    assert result["has_watermark"] is False
+    assert not (tmp_path / "output.pptx").exists()
+
+
+def test_remover_uses_detector_results(tmp_path: Path) -> None:
+    """Passing detector results should remove the same shapes as a full scan."""
+    input_pptx = tmp_path / "input.pptx"
+    output_pptx = tmp_path / "output.pptx"
+    _create_mock_pptx(str(input_pptx))
+    detected = PPTXWatermarkDetector().detect_watermarks(str(input_pptx))
+
+    result = PPTXWatermarkRemover().remove_watermarks(
+        str(input_pptx), str(output_pptx), detected=detected
+    )
+
+    assert result["success"] is True
+    assert result["watermarks_removed"] == 1
+    assert _watermark_count(str(output_pptx)) == 0
+
+
+def test_pptx_processor_accepts_bytes(tmp_path: Path) -> None:
+    """In-memory uploads are processed without a temp file."""
+    input_pptx = tmp_path / "input.pptx"
+    output_pptx = tmp_path / "output.pptx"
+    _create_mock_pptx(str(input_pptx))
+
+    result = PPTXProcessor().process(
+        input_pptx.read_bytes(), str(output_pptx), "input.pptx"
+    )
+
+    assert result["success"] is True
+    assert result["stats"]["watermarks_removed"] == 1
+    assert _watermark_count(str(output_pptx)) == 0
+
+
+def test_detector_and_remover_share_stream(tmp_path: Path) -> None:
+    """One in-memory copy of a deck can feed both detector and remover."""
+    input_pptx = tmp_path / "input.pptx"
+    output_pptx = tmp_path / "output.pptx"
+    _create_mock_pptx(str(input_pptx))
+    stream = io.BytesIO(input_pptx.read_bytes())
+
+    detected = PPTXWatermarkDetector().detect_watermarks(stream)
+    result = PPTXWatermarkRemover().remove_watermarks(
+        stream, str(output_pptx), detected=detected
+    )
+
+    assert result["watermarks_removed"] == 1
+    assert _watermark_count(str(output_pptx)) == 0
+
+
+def test_package_mentions_checks_relationships(tmp_path: Path) -> None:
+    """The byte-level pre-check only finds domains used by relationships."""
+    linked = tmp_path / "linked.pptx"
+    unlinked = tmp_path / "unlinked.pptx"
+    _create_mock_pptx(str(linked), link="https://GAMMA.app/docs")
+    _create_mock_pptx(str(unlinked), link="https://example.com")
+
+    with closing(PPTXPackage(str(linked))) as package:
+        assert package.mentions("gamma.app") is True
+    with closing(PPTXPackage(str(unlinked))) as package:
+        assert package.mentions("gamma.app") is False
+        # The negative answer came from the .rels bytes alone
+        assert "_presentation" not in vars(package)
+
+
+def test_detect_and_remove_skips_parsing_unlinked_decks(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Decks without a target link are answered without parsing any XML."""
+    unlinked = tmp_path / "unlinked.pptx"
+    _create_mock_pptx(str(unlinked), link="https://example.com")
+
+    def fail_load(self: PPTXPackage, partname: str) -> None:
+        raise AssertionError(f"parsed {partname}")
+
+    monkeypatch.setattr(PPTXPackage, "load", fail_load)
+    result = PPTXWatermarkRemover().detect_and_remove(
+        str(unlinked), str(tmp_path / "output.pptx")
+    )
+
+    assert result["success"] is True
+    assert result["watermarks_detected"] == 0
+
+
+def test_clean_many_matches_single_runs(tmp_path: Path) -> None:
+    """Batch cleaning in worker processes gives the per-file results."""
+    jobs = []
+    for name, link in (("a", GAMMA_URL), ("b", None), ("c", GAMMA_URL)):
+        input_pptx = tmp_path / f"{name}.pptx"
+        _create_mock_pptx(str(input_pptx), link=link)
+        jobs.append((str(input_pptx), str(tmp_path / f"{name}_clean.pptx")))
+
+    results = PPTXWatermarkRemover().clean_many(jobs, workers=2)
+
+    assert [r["watermarks_removed"] for r in results] == [1, 0, 1]
+    assert all(r["success"] for r in results)
+    assert _watermark_count(jobs[2][1]) == 0
+
+
+def test_detector_has_watermarks_and_count(tmp_path: Path) -> None:
+    """The early-exit helpers agree with the full detection results."""
+    linked = tmp_path / "linked.pptx"
+    clean = tmp_path / "clean.pptx"
+    _create_mock_pptx(str(linked))
+    _create_mock_pptx(str(clean), link=None)
+    detector = PPTXWatermarkDetector()
+
+    assert detector.has_watermarks(str(linked)) is True
+    assert detector.get_watermark_count(str(linked)) == _watermark_count(str(linked))
+    assert detector.has_watermarks(str(clean)) is False
+    assert detector.get_watermark_count(str(clean)) == 0
+
+
+def test_remover_keeps_entry_metadata(tmp_path: Path) -> None:
+    """Only the cleaned layout changes; every entry keeps its ZIP metadata."""
+    built_pptx = tmp_path / "built.pptx"
+    input_pptx = tmp_path / "input.pptx"
+    output_pptx = tmp_path / "output.pptx"
+    _create_mock_pptx(str(built_pptx))
+    # Rewrite it as a streaming writer would, with data descriptors after
+    # every entry, and give one entry an extra field to carry over.
+    extra = b"\xfe\xca\x04\x00test"
+    buffer = io.BytesIO()
+    with (
+        zipfile.ZipFile(built_pptx) as src,
+        zipfile.ZipFile(_Unseekable(buffer), "w") as dst,
+    ):
+        for info in src.infolist():
+            if info.filename == "docProps/app.xml":
+                info.extra = extra
+            dst.writestr(info, src.read(info))
+    input_pptx.write_bytes(buffer.getvalue())
+
+    result = PPTXWatermarkRemover().detect_and_remove(str(input_pptx), str(output_pptx))
+
+    assert result["success"] is True
+    assert result["detected"] == [
+        {
+            "location_type": "slide_layout",
+            "location_name": "Title and Content",
+            "shape_name": "Made with Gamma",
+            "hyperlink": GAMMA_URL,
+        }
+    ]
+    with zipfile.ZipFile(input_pptx) as src, zipfile.ZipFile(output_pptx) as dst:
+        assert dst.testzip() is None
+        assert dst.namelist() == src.namelist()
+        changed = [
+            info.filename
+            for info in src.infolist()
+            if dst.getinfo(info.filename).CRC != info.CRC
+        ]
+        assert changed == ["ppt/slideLayouts/slideLayout2.xml"]
+        for info in src.infolist():
+            copied = dst.getinfo(info.filename)
+            assert copied.date_time == info.date_time
+            assert copied.compress_type == info.compress_type
+            assert copied.external_attr == info.external_attr
+            assert copied.extra == info.extra
+            assert info.flag_bits & 0x08
+            if info.filename not in changed:
+                assert dst.read(info.filename) == src.read(info)
+        assert dst.getinfo("docProps/app.xml").extra == extra
+    assert _watermark_count(str(output_pptx)) == 0
+
+
+def test_cached_parts_are_not_modified_by_removal(tmp_path: Path) -> None:
+    """Repeated runs on one path reuse parses without seeing earlier removals."""
+    input_pptx = tmp_path / "input.pptx"
+    _create_mock_pptx(str(input_pptx))
+    detector = PPTXWatermarkDetector(cache_parts=True)
+    remover = PPTXWatermarkRemover(cache_parts=True)
+
+    detected = detector.detect_watermarks(str(input_pptx))
+    first = remover.remove_watermarks(
+        str(input_pptx), str(tmp_path / "first.pptx"), detected=detected
+    )
+    second = remover.remove_watermarks(str(input_pptx), str(tmp_path / "second.pptx"))
+
+    assert first["watermarks_removed"] == second["watermarks_removed"] == 1
+
+    # Rewriting the file changes its signature, so stale parses are not used
+    _create_mock_pptx(str(input_pptx), link="https://example.com")
+    results = detector.detect_watermarks(str(input_pptx))
+    assert [r["hyperlink"] for r in results] == ["https://example.com"]
+
+
+def test_parts_are_not_cached_by_default(tmp_path: Path) -> None:
+    """Without cache_parts, one-off runs leave nothing behind."""
+    input_pptx = tmp_path / "input.pptx"
+    _create_mock_pptx(str(input_pptx))
+    package_module._parsed_parts.clear()
+
+    PPTXWatermarkRemover().detect_and_remove(
+        str(input_pptx), str(tmp_path / "output.pptx")
+    )
+
+    assert not package_module._parsed_parts._entries
+
+
+def test_session_detects_and_removes_on_one_parse(tmp_path: Path) -> None:
+    """A session gives the detector's results and the remover's output."""
+    input_pptx = tmp_path / "input.pptx"
+    output_pptx = tmp_path / "output.pptx"
+    _create_mock_pptx(str(input_pptx))
+
+    with open_pptx(input_pptx.read_bytes()) as session:
+        assert session.has_watermarks() is True
+        # The badge is on the second layout, so the search stopped there.
+        assert len(session._corner_pictures) == 3
+        assert session.detect() == PPTXWatermarkDetector().detect_watermarks(
+            str(input_pptx)
+        )
+        result = session.remove(str(output_pptx))
+        with pytest.raises(RuntimeError):
+            session.has_watermarks()
+
+    assert result["success"] is True
+    assert result["watermarks_removed"] == 1
+    assert _watermark_count(str(output_pptx)) == 0
@@ -0,0 +1,49 @@
+"""
+Pytest tests for the upload result cache.
+
+Run with:  pytest test/test_result_cache.py -v
+"""
+
+import os
+from pathlib import Path
+
+from utils.result_cache import ResultCache
+
+RESULT = {"success": True, "has_watermark": True, "message": "done"}
+
+
+def test_cache_hit_returns_result_and_output(tmp_path: Path) -> None:
+    """A cached entry is returned while its output file is unchanged."""
+    (tmp_path / "processed_a.pdf").write_bytes(b"%PDF-clean")
+    cache = ResultCache()
+    cache.put("pdf:abc", RESULT, str(tmp_path), "processed_a.pdf")
+
+    assert cache.get("pdf:abc", str(tmp_path)) == (RESULT, "processed_a.pdf")
+    assert cache.get("pdf:other", str(tmp_path)) is None
+
+
+def test_cache_entry_dropped_when_output_changes(tmp_path: Path) -> None:
+    """Expired or overwritten outputs invalidate the cached entry."""
+    output = tmp_path / "processed_a.pdf"
+    output.write_bytes(b"%PDF-clean")
+    cache = ResultCache()
+    cache.put("pdf:abc", RESULT, str(tmp_path), "processed_a.pdf")
+
+    output.write_bytes(b"%PDF-a different upload")
+    os.utime(output, ns=(0, 0))
+
+    assert cache.get("pdf:abc", str(tmp_path)) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """The oldest entry is evicted once maxsize is exceeded."""
+    clean = {"success": True, "has_watermark": False, "message": "clean"}
+    cache = ResultCache(maxsize=2)
+    cache.put("a", clean, str(tmp_path), "processed_a.pdf")
+    cache.put("b", clean, str(tmp_path), "processed_b.pdf")
+    cache.get("a", str(tmp_path))
+    cache.put("c", clean, str(tmp_path), "processed_c.pdf")
+
+    assert cache.get("b", str(tmp_path)) is None
+    assert cache.get("a", str(tmp_path)) is not None
+    assert cache.get("c", str(tmp_path)) is not None
@@ -0,0 +1,194 @@
+"""
+Pytest tests for upload validation helpers.
+
+Run with:  pytest test/test_upload_processing.py -v
+"""
+
+import asyncio
+import io
+import logging
+import os
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+
+from utils import upload_processing
+from utils.file_helpers import safe_filename, sniff_file_type, zip_container_type
+from utils.upload_processing import (
+    INVALID_TYPE_ERROR,
+    UploadTooLargeError,
+    _write_temp_upload,
+    normalize_upload_name,
+)
+
+
+def test_safe_filename_strips_unsafe_characters() -> None:
+    """Path separators, spaces and leading dots never survive sanitizing."""
+    assert safe_filename("My Deck (1).pdf") == "My_Deck_1_.pdf"
+    assert safe_filename("../../etc/passwd") == "etc_passwd"
+    assert safe_filename("processed_1a2b3c4d_deck.pdf") == (
+        "processed_1a2b3c4d_deck.pdf"
+    )
+
+
+def test_normalize_upload_name_keeps_extension() -> None:
+    """The validated extension is always kept, lower-cased."""
+    assert normalize_upload_name("My Deck.PDF") == ("My_Deck.pdf", "pdf", None)
+    assert normalize_upload_name("../slides.pptx") == ("slides.pptx", "pptx", None)
+
+
+def test_normalize_upload_name_non_ascii_fallback() -> None:
+    """Names that sanitize to nothing get a random stem."""
+    filename, extension, error = normalize_upload_name("презентация.pptx")
+
+    assert error is None
+    assert extension == "pptx"
+    assert len(filename) == len("12345678.pptx")
+
+
+def test_normalize_upload_name_rejects_unsupported() -> None:
+    """Unsupported or missing names are reported as errors."""
+    assert normalize_upload_name("")[2] == "No file selected."
+    assert normalize_upload_name("notes.txt")[2] == INVALID_TYPE_ERROR
+
+
+def test_sniff_file_type_from_content() -> None:
+    """Supported formats are recognised by their leading bytes."""
+    assert sniff_file_type(b"%PDF-1.7\n") == "pdf"
+    assert sniff_file_type(b"\x89PNG\r\n\x1a\n") == "png"
+    assert sniff_file_type(b"PK\x03\x04") == "zip"
+    assert sniff_file_type(b"hello") is None
+    assert zip_container_type(["[Content_Types].xml", "ppt/presentation.xml"]) == (
+        "pptx"
+    )
+    assert zip_container_type(["Index/Document.iwa", "Metadata/Properties.plist"]) == (
+        "key"
+    )
+    assert zip_container_type(["slide1.png"]) == "zip"
+
+
+def test_normalize_upload_name_prefers_detected_type() -> None:
+    """Renamed or extensionless uploads take the type found in their content."""
+    assert normalize_upload_name("deck", "pdf") == ("deck.pdf", "pdf", None)
+    assert normalize_upload_name("deck.pptx", "pdf") == ("deck.pdf", "pdf", None)
+    assert normalize_upload_name("notes.txt", "pdf") == ("notes.txt.pdf", "pdf", None)
+
+
+def test_write_temp_upload_trims_overstated_size() -> None:
+    """A declared size larger than the body leaves no preallocated padding."""
+    upload = UploadFile(io.BytesIO(b"%PDF-short"), size=4096, filename="a.pdf")
+
+    temp_path, _ = asyncio.run(_write_temp_upload(upload, "pdf"))
+    try:
+        with open(temp_path, "rb") as temp_input:
+            assert temp_input.read() == b"%PDF-short"
+    finally:
+        os.unlink(temp_path)
+
+
+def test_write_temp_upload_stops_at_size_limit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Uploads of unknown size are cut off once they pass MAX_UPLOAD_SIZE."""
+    monkeypatch.setattr(upload_processing, "MAX_UPLOAD_SIZE", 8)
+    upload = UploadFile(io.BytesIO(b"%PDF-" + b"x" * 64), filename="a.pdf")
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(_write_temp_upload(upload, "pdf"))
+
+
+def test_request_size_limits_per_route() -> None:
+    """Single uploads stop at one file's limit, batches at the batch cap."""
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    from app import MAX_REQUEST_SIZE, limit_request_size
+
+    async def call_next(request: Request) -> Response:
+        return Response(status_code=200)
+
+    def status_for(path: str, size: int) -> int:
+        request = Request(
+            {
+                "type": "http",
+                "method": "POST",
+                "path": path,
+                "query_string": b"",
+                "headers": [(b"content-length", str(size).encode())],
+            }
+        )
+        return asyncio.run(limit_request_size(request, call_next)).status_code
+
+    batch_cap = upload_processing.MAX_BATCH_REQUEST_SIZE
+    assert status_for("/remove_watermark", MAX_REQUEST_SIZE + 1) == 413
+    assert status_for("/api/remove_watermarks", MAX_REQUEST_SIZE + 1) == 200
+    assert status_for("/api/remove_watermarks", batch_cap + 1) == 413
+
+
+def test_duplicate_upload_survives_cancelled_original(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """A waiting duplicate runs the job itself when the first request is cancelled."""
+    calls = 0
+
+    async def fake_dispatch(*args: object) -> dict[str, object]:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(3600)
+        return {"success": True, "has_watermark": False}
+
+    monkeypatch.setattr(upload_processing, "_dispatch", fake_dispatch)
+    content = b"%PDF-cancelled-original"
+
+    def process() -> "asyncio.Task[tuple[dict[str, object], str]]":
+        upload = UploadFile(io.BytesIO(content), size=len(content), filename="a.pdf")
+        return asyncio.create_task(
+            upload_processing._process_upload(upload, str(tmp_path), "a.pdf", "pdf")
+        )
+
+    async def scenario() -> tuple[dict[str, object], str]:
+        first = process()
+        while calls == 0:
+            await asyncio.sleep(0)
+        second = process()
+        while "Waiting for identical upload" not in caplog.text:
+            await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    with caplog.at_level(logging.INFO, logger=upload_processing.__name__):
+        result, _ = asyncio.run(scenario())
+
+    assert result["success"] is True
+    assert calls == 2
+
+
+def test_api_upload_deletes_temp_input_before_returning(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Batch files do not keep their temp inputs until the response is sent."""
+    sources = []
+
+    async def fake_dispatch(
+        processor: object, extension: str, source: str, *args: object
+    ) -> dict[str, object]:
+        sources.append(source)
+        assert os.path.exists(source)
+        return {"success": False, "error": "nothing to do"}
+
+    monkeypatch.setattr(upload_processing, "_fits_in_memory", lambda *args: False)
+    monkeypatch.setattr(upload_processing, "_dispatch", fake_dispatch)
+    content = b"%PDF-temp-input"
+    upload = UploadFile(io.BytesIO(content), size=len(content), filename="a.pdf")
+
+    result = asyncio.run(upload_processing.process_api_upload(upload, str(tmp_path)))
+
+    assert result["success"] is False
+    assert len(sources) == 1
+    assert not os.path.exists(sources[0])
@@ -0,0 +1,25 @@
+"""
+Pytest tests for the shared processing pool.
+
+Run with:  pytest test/test_workers.py -v
+"""
+
+import asyncio
+import logging
+
+from utils import workers
+
+
+def _root_handler_types() -> list[str]:
+    """Report the root logger's handlers as seen inside a pool worker."""
+    return [type(handler).__name__ for handler in logging.getLogger().handlers]
+
+
+def test_pool_workers_configure_logging() -> None:
+    """Spawned workers log through the shared queue setup, not to nowhere."""
+    try:
+        handlers = asyncio.run(workers.run_in_process_pool(_root_handler_types))
+    finally:
+        workers.shutdown_process_pool()
+
+    assert "QueueHandler" in handlers
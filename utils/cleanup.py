@@ -9,6 +9,9 @@ from contextlib import AbstractAsyncContextManager, asynccontextmanager
 
 from fastapi import FastAPI
 
+from utils.download_helpers import forget_output
+from utils.workers import shutdown_process_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +27,10 @@ async def cleanup_old_files(
     """Periodically delete generated files older than max_age_seconds."""
     while True:
         try:
-            cleaned = _delete_expired_files(output_folder, max_age_seconds)
+            # Listing and unlinking a large folder should not stall requests.
+            cleaned = await asyncio.to_thread(
+                _delete_expired_files, output_folder, max_age_seconds
+            )
             if cleaned > 0:
                 logger.info(
                     "Auto-cleanup: removed %s expired file(s) from %s/",
@@ -49,6 +55,7 @@ def _delete_expired_files(output_folder: str, max_age_seconds: int) -> int:
         file_age = now - os.path.getmtime(file_path)
         if file_age > max_age_seconds:
             os.unlink(file_path)
+            forget_output(output_folder, filename)
             cleaned += 1
             logger.debug("Auto-cleanup: removed %s (age: %.0fs)", filename, file_age)
     return cleaned
@@ -76,5 +83,6 @@ def create_lifespan(
         except asyncio.CancelledError:
             pass
         logger.info("Auto-cleanup background task stopped")
+        shutdown_process_pool()
 
     return lifespan
@@ -2,20 +2,27 @@
 
 import io
 import os
+import stat
 import zipfile
+from functools import lru_cache
 
-from werkzeug.utils import secure_filename
+from utils.file_helpers import safe_filename
+
+# Real paths of outputs written by this process. They are known to live inside
+# the output folder, so downloads of them skip the realpath containment check.
+# Other workers' or older outputs still resolve through the full check.
+_generated_outputs: set[str] = set()
 
 
 def build_zip(files: str, output_folder: str) -> io.BytesIO | None:
     """Bundle existing output files from a comma-separated filename list."""
-    file_list = [file.strip() for file in files.split(",") if file.strip()]
+    file_list = dict.fromkeys(file.strip() for file in files.split(",") if file.strip())
     zip_buffer = io.BytesIO()
     added = 0
 
     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
         for filename in file_list:
-            safe_name = secure_filename(filename)
+            safe_name = safe_filename(filename)
             file_path = os.path.join(output_folder, safe_name)
             if os.path.isfile(file_path):
                 zip_file.write(file_path, arcname=safe_name)
@@ -27,14 +34,41 @@ def build_zip(files: str, output_folder: str) -> io.BytesIO | None:
     return zip_buffer
 
 
-def resolve_output_file(filename: str, output_folder: str) -> tuple[str, str] | None:
-    """Return safe filename and real path when it exists within output_folder."""
-    safe_name = secure_filename(filename)
+def resolve_output_file(
+    filename: str, output_folder: str
+) -> tuple[str, str, os.stat_result] | None:
+    """Return safe filename, real path and stat for a file in output_folder."""
+    safe_name = safe_filename(filename)
     if not safe_name:
         return None
 
-    file_path = os.path.realpath(os.path.join(output_folder, safe_name))
-    output_root = os.path.realpath(output_folder)
-    if not file_path.startswith(output_root + os.sep) or not os.path.isfile(file_path):
+    output_root = _output_root(output_folder)
+    file_path = os.path.join(output_root, safe_name)
+    if file_path not in _generated_outputs:
+        file_path = os.path.realpath(file_path)
+        if not file_path.startswith(output_root + os.sep):
+            return None
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        _generated_outputs.discard(file_path)
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
         return None
-    return safe_name, file_path
+    return safe_name, file_path, file_stat
+
+
+def register_output(output_folder: str, filename: str) -> None:
+    """Remember an output file this process has just written."""
+    _generated_outputs.add(os.path.join(_output_root(output_folder), filename))
+
+
+def forget_output(output_folder: str, filename: str) -> None:
+    """Drop a deleted output file from the registry."""
+    _generated_outputs.discard(os.path.join(_output_root(output_folder), filename))
+
+
+@lru_cache(maxsize=8)
+def _output_root(output_folder: str) -> str:
+    """Resolve an output folder once instead of on every download."""
+    return os.path.realpath(output_folder)
@@ -1,27 +1,61 @@
 """File handling utility functions."""
 
-ALLOWED_EXTENSIONS = {"pdf", "pptx", "key", "zip", "png"}
+import re
+
+ALLOWED_EXTENSIONS = frozenset({"pdf", "pptx", "key", "zip", "png"})
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+# Leading bytes of each supported format; PPTX, Keynote and ZIP uploads all
+# start with a ZIP local file header and are told apart by their entries.
+FILE_SIGNATURES = {
+    b"%PDF": "pdf",
+    b"\x89PNG": "png",
+    b"PK\x03\x04": "zip",
+}
+SIGNATURE_LENGTH = 4
+
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "pptx": (
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    ),
+    "key": "application/x-iwork-keynote-sffkey",
+    "zip": "application/zip",
+    "png": "image/png",
+}
 
 
 def allowed_file(filename: str) -> bool:
     """Check if the file extension is allowed."""
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+    return get_file_extension(filename) in ALLOWED_EXTENSIONS
 
 
 def get_file_extension(filename: str) -> str:
     """Get the file extension in lowercase."""
-    return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+    dot = filename.rfind(".")
+    return filename[dot + 1 :].lower() if dot >= 0 else ""
+
+
+def sniff_file_type(header: bytes) -> str | None:
+    """Guess a supported file type from the first bytes of its content."""
+    return FILE_SIGNATURES.get(header[:SIGNATURE_LENGTH])
+
+
+def zip_container_type(names: list[str]) -> str:
+    """Classify a ZIP archive as pptx, key or a plain zip from its entries."""
+    if "ppt/presentation.xml" in names:
+        return "pptx"
+    if any(name == "Index.zip" or name.startswith("Index/") for name in names):
+        return "key"
+    return "zip"
 
 
 def get_mime_type(extension: str) -> str:
     """Get the MIME type for a file extension."""
-    mime_types = {
-        "pdf": "application/pdf",
-        "pptx": (
-            "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        ),
-        "key": "application/x-iwork-keynote-sffkey",
-        "zip": "application/zip",
-        "png": "image/png",
-    }
-    return mime_types.get(extension, "application/octet-stream")
+    return MIME_TYPES.get(extension, "application/octet-stream")
+
+
+def safe_filename(filename: str) -> str:
+    """Reduce a filename to [A-Za-z0-9._-] without leading or trailing dots."""
+    return _UNSAFE_FILENAME_CHARS.sub("_", filename).strip("._")
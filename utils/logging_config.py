@@ -0,0 +1,31 @@
+"""Queue-backed logging so request handlers never block on stderr."""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = logging.INFO
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener: QueueListener | None = None
+
+
+def configure_logging(level: int = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """Route root logging through a queue drained by one background thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(fmt))
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler)
+
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener.start()
+    # Flush anything still queued when the interpreter exits.
+    atexit.register(_listener.stop)
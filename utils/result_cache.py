@@ -0,0 +1,67 @@
+"""In-memory LRU of processing results keyed by upload content."""
+
+import copy
+import os
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+RESULT_CACHE_SIZE = 256
+
+
+class CachedResult(NamedTuple):
+    """A processor result and the output file it produced."""
+
+    result: dict[str, Any]
+    output_filename: str
+    output_signature: tuple[int, int] | None
+
+
+class ResultCache:
+    """LRU mapping upload digests to results whose outputs still exist."""
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+
+    def get(self, key: str, output_folder: str) -> tuple[dict[str, Any], str] | None:
+        """Return a cached (result, output_filename) if its output is intact."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.output_signature is not None and entry.output_signature != (
+            _file_signature(os.path.join(output_folder, entry.output_filename))
+        ):
+            # Expired by cleanup or overwritten by a same-named upload.
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry.result), entry.output_filename
+
+    def put(
+        self,
+        key: str,
+        result: dict[str, Any],
+        output_folder: str,
+        output_filename: str,
+    ) -> None:
+        """Remember a successful result and the current state of its output."""
+        signature = None
+        if result.get("has_watermark"):
+            signature = _file_signature(os.path.join(output_folder, output_filename))
+            if signature is None:
+                return
+        self._entries[key] = CachedResult(
+            copy.deepcopy(result), output_filename, signature
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+def _file_signature(path: str) -> tuple[int, int] | None:
+    """Return (size, mtime_ns) for path, or None when it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
@@ -1,16 +1,26 @@
 """Upload validation and processor dispatch helpers for the web app."""
 
 import asyncio
+import copy
+import hashlib
 import logging
 import os
 import tempfile
 import uuid
+import zipfile
 from typing import Any
 
-from fastapi import UploadFile
-from werkzeug.utils import secure_filename
+from fastapi import BackgroundTasks, UploadFile
 
-from utils.file_helpers import allowed_file, get_file_extension
+from utils.download_helpers import register_output
+from utils.file_helpers import (
+    ALLOWED_EXTENSIONS,
+    SIGNATURE_LENGTH,
+    get_file_extension,
+    safe_filename,
+    sniff_file_type,
+    zip_container_type,
+)
 from utils.processors import (
     KeynoteProcessor,
     PDFProcessor,
@@ -18,9 +28,27 @@ from utils.processors import (
     PPTXProcessor,
     ZIPProcessor,
 )
+from utils.result_cache import ResultCache
+from utils.workers import run_in_process_pool
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+MAX_FILENAME_STEM_LENGTH = 120
+MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+UPLOAD_TOO_LARGE_ERROR = "File too large. The maximum upload size is 200 MB."
+# The web UI posts one file per request; API clients may batch several
+# files into one request, up to this total.
+MAX_BATCH_REQUEST_SIZE = 1024 * 1024 * 1024
+BATCH_TOO_LARGE_ERROR = (
+    "Request too large. The maximum total upload size per request is 1 GB."
+)
+
+# PDF and PPTX processors also accept bytes; uploads up to this size skip the
+# temp file and are parsed straight from memory.
+IN_MEMORY_TYPES = {"pdf", "pptx"}
+IN_MEMORY_UPLOAD_LIMIT = 32 * 1024 * 1024
+
 INVALID_TYPE_ERROR = (
     "Invalid file type. Supported: PDF, PPTX, Keynote (.key), ZIP of PNGs."
 )
@@ -33,30 +61,55 @@ PROCESSORS = {
     "png": PNGProcessor(),
 }
 
+# Keynote conversion waits on Keynote.app under a process-local lock, so it
+# stays on a thread; every other format is CPU-bound parsing.
+THREAD_PROCESSED_TYPES = {"key"}
+
+RESULT_CACHE = ResultCache()
+
+# Uploads currently being processed, keyed like RESULT_CACHE, so identical
+# concurrent uploads share one run. Only touched from the event loop.
+IN_FLIGHT: dict[str, asyncio.Future[tuple[dict[str, Any], str]]] = {}
+
 
-def normalize_upload_name(original_name: str) -> tuple[str, str, str | None]:
-    """Return sanitized filename, extension, and validation error if any."""
+class UploadTooLargeError(Exception):
+    """Raised while copying an upload that exceeds MAX_UPLOAD_SIZE."""
+
+
+def normalize_upload_name(
+    original_name: str, detected_type: str | None = None
+) -> tuple[str, str, str | None]:
+    """Return sanitized filename, extension, and validation error if any.
+
+    A type detected from the upload's content wins over the name's extension,
+    so renamed files and names without an extension are still accepted.
+    """
     if not original_name:
         return "Unknown", "", "No file selected."
-    if not allowed_file(original_name):
+    named_type = get_file_extension(original_name)
+    if named_type not in ALLOWED_EXTENSIONS:
+        named_type = ""
+    extension = detected_type or named_type
+    if not extension:
         return original_name, "", INVALID_TYPE_ERROR
 
-    original_extension = get_file_extension(original_name)
-    filename = secure_filename(original_name)
-    if not get_file_extension(filename) and original_extension:
-        filename = f"{uuid.uuid4().hex[:8]}.{original_extension}"
-
-    extension = get_file_extension(filename)
-    if not extension:
-        return original_name, "", "Invalid file name. Extension missing."
-    return filename, extension, None
+    stem = original_name[: -len(named_type) - 1] if named_type else original_name
+    safe_stem = safe_filename(stem[:MAX_FILENAME_STEM_LENGTH])
+    if not safe_stem:
+        # Names made only of non-ASCII characters sanitize to nothing.
+        safe_stem = uuid.uuid4().hex[:8]
+    return f"{safe_stem}.{extension}", extension, None
 
 
 async def process_form_upload(
-    uploaded_file: UploadFile, output_folder: str
+    uploaded_file: UploadFile,
+    output_folder: str,
+    background_tasks: BackgroundTasks | None = None,
 ) -> dict[str, Any]:
     """Process one upload for the HTML form and return template context."""
-    filename, extension, error = normalize_upload_name(uploaded_file.filename or "")
+    filename, extension, error = normalize_upload_name(
+        uploaded_file.filename or "", await _sniff_upload_type(uploaded_file)
+    )
     if error:
         return {"error_message": _form_error_message(error)}
 
@@ -69,7 +122,7 @@ async def process_form_upload(
 
     try:
         result, output_filename = await _process_upload(
-            uploaded_file, output_folder, filename, extension, unique_output=False
+            uploaded_file, output_folder, filename, extension, background_tasks
         )
         if not result["success"]:
             return {"error_message": result.get("error", "Unknown error occurred.")}
@@ -82,15 +135,21 @@ async def process_form_upload(
 async def process_api_upload(
     uploaded_file: UploadFile, output_folder: str
 ) -> dict[str, Any]:
-    """Process one upload for the batch API and return a JSON-safe result."""
+    """Process one upload for the batch API and return a JSON-safe result.
+
+    Each temp input is deleted as soon as its file is done, so a batch never
+    holds more than one on disk.
+    """
     original_name = uploaded_file.filename or "Unknown"
-    filename, extension, error = normalize_upload_name(uploaded_file.filename or "")
+    filename, extension, error = normalize_upload_name(
+        uploaded_file.filename or "", await _sniff_upload_type(uploaded_file)
+    )
     if error:
         return {"filename": original_name, "success": False, "error": error}
 
     try:
         result, output_filename = await _process_upload(
-            uploaded_file, output_folder, filename, extension, unique_output=True
+            uploaded_file, output_folder, filename, extension
         )
         if not result["success"]:
             return {
@@ -109,46 +168,188 @@ async def _process_upload(
     output_folder: str,
     filename: str,
     extension: str,
-    unique_output: bool,
+    background_tasks: BackgroundTasks | None = None,
 ) -> tuple[dict[str, Any], str]:
-    """Persist upload temporarily, dispatch it, and always clean up temp input."""
-    temp_path = await _write_temp_upload(uploaded_file, extension)
+    """Persist upload temporarily, dispatch it, and always clean up temp input.
+
+    With background_tasks, the temp input is deleted after the response has
+    been sent instead of before it; otherwise it is deleted on return.
+    """
+    processor = PROCESSORS.get(extension)
+    if processor is None:
+        return {
+            "success": False,
+            "error": f"Unsupported file type: {extension}",
+        }, ""
+
+    if uploaded_file.size is not None and uploaded_file.size > MAX_UPLOAD_SIZE:
+        return {"success": False, "error": UPLOAD_TOO_LARGE_ERROR}, ""
+
+    temp_path = None
+    source: str | bytes
     try:
-        output_filename = _output_filename(filename, unique_output)
-        output_path = os.path.join(output_folder, output_filename)
-        processor = PROCESSORS.get(extension)
-        if processor is None:
-            return {
-                "success": False,
-                "error": f"Unsupported file type: {extension}",
-            }, ""
-        result = await asyncio.to_thread(
-            processor.process, temp_path, output_path, filename
-        )
-        return result, output_filename
-    finally:
+        if _fits_in_memory(uploaded_file, extension):
+            source, digest = await _read_upload(uploaded_file)
+        else:
+            temp_path, digest = await _write_temp_upload(uploaded_file, extension)
+            source = temp_path
+    except UploadTooLargeError:
+        return {"success": False, "error": UPLOAD_TOO_LARGE_ERROR}, ""
+    try:
+        cache_key = f"{extension}:{digest}"
+        cached = RESULT_CACHE.get(cache_key, output_folder)
+        if cached is not None:
+            logger.info("Reusing cached result for identical upload: %s", filename)
+            return cached
+
+        while (pending := IN_FLIGHT.get(cache_key)) is not None:
+            logger.info("Waiting for identical upload in progress: %s", filename)
+            # wait() neither cancels pending nor raises when it was cancelled
+            await asyncio.wait((pending,))
+            if not pending.cancelled():
+                result, output_filename = pending.result()
+                return copy.deepcopy(result), output_filename
+            # The request running it went away; run it here unless another
+            # waiter already took over.
+            logger.info("Identical upload was cancelled, retrying: %s", filename)
+
+        future: asyncio.Future[tuple[dict[str, Any], str]]
+        future = asyncio.get_running_loop().create_future()
+        IN_FLIGHT[cache_key] = future
         try:
-            os.unlink(temp_path)
-        except OSError:
-            pass
+            output_filename = _output_filename(filename, digest)
+            result = await _dispatch(
+                processor,
+                extension,
+                source,
+                os.path.join(output_folder, output_filename),
+                filename,
+            )
+            if result["success"]:
+                RESULT_CACHE.put(cache_key, result, output_folder, output_filename)
+            if result.get("has_watermark"):
+                register_output(output_folder, output_filename)
+            future.set_result((result, output_filename))
+            return result, output_filename
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved in case nobody else was waiting.
+            future.exception()
+            raise
+        finally:
+            del IN_FLIGHT[cache_key]
+    finally:
+        if temp_path is not None and background_tasks is not None:
+            background_tasks.add_task(_discard_file, temp_path)
+        elif temp_path is not None:
+            _discard_file(temp_path)
+
+
+async def _dispatch(
+    processor: Any,
+    extension: str,
+    source: str | bytes,
+    output_path: str,
+    filename: str,
+) -> dict[str, Any]:
+    """Run a processor on a thread or in the process pool, by file type."""
+    if extension in THREAD_PROCESSED_TYPES:
+        return await asyncio.to_thread(processor.process, source, output_path, filename)
+    return await run_in_process_pool(processor.process, source, output_path, filename)
+
+
+async def _sniff_upload_type(uploaded_file: UploadFile) -> str | None:
+    """Detect the upload's type from its content, leaving it rewound."""
+    header = await uploaded_file.read(SIGNATURE_LENGTH)
+    await uploaded_file.seek(0)
+    file_type = sniff_file_type(header)
+    if file_type != "zip":
+        return file_type
+    # Only the central directory is read; the spooled upload is seekable.
+    try:
+        with zipfile.ZipFile(uploaded_file.file) as archive:
+            file_type = zip_container_type(archive.namelist())
+    except zipfile.BadZipFile:
+        file_type = None
+    await uploaded_file.seek(0)
+    return file_type
+
 
+def _fits_in_memory(uploaded_file: UploadFile, extension: str) -> bool:
+    """Whether the upload can be handed to its processor as bytes."""
+    size = uploaded_file.size
+    return (
+        extension in IN_MEMORY_TYPES
+        and size is not None
+        and size <= IN_MEMORY_UPLOAD_LIMIT
+    )
+
+
+async def _read_upload(uploaded_file: UploadFile) -> tuple[bytes, str]:
+    """Read UploadFile content into memory; return the bytes and digest."""
+    content = bytearray()
+    digest = hashlib.blake2b(digest_size=16)
+    while chunk := await uploaded_file.read(UPLOAD_CHUNK_SIZE):
+        digest.update(chunk)
+        content += chunk
+        if len(content) > MAX_UPLOAD_SIZE:
+            raise UploadTooLargeError
+    return bytes(content), digest.hexdigest()
+
+
+async def _write_temp_upload(
+    uploaded_file: UploadFile, extension: str
+) -> tuple[str, str]:
+    """Stream UploadFile content to a temporary file; return path and digest."""
+    fd, temp_path = tempfile.mkstemp(suffix=f".{extension}")
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        _preallocate(fd, uploaded_file.size)
+        with os.fdopen(fd, "wb") as temp_input:
+            written = 0
+            while chunk := await uploaded_file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > MAX_UPLOAD_SIZE:
+                    raise UploadTooLargeError
+                digest.update(chunk)
+                temp_input.write(chunk)
+            # Drop any preallocated tail if the upload was shorter than declared.
+            temp_input.truncate()
+    except BaseException:
+        _discard_file(temp_path)
+        raise
+    return temp_path, digest.hexdigest()
+
+
+def _preallocate(fd: int, size: int | None) -> None:
+    """Reserve contiguous space for a file of known size, where supported."""
+    if not size or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as exc:
+        # Not every filesystem supports it; the write just proceeds without.
+        logger.debug("Could not preallocate %s bytes: %s", size, exc)
+
+
+def _discard_file(path: str) -> None:
+    """Delete a file, ignoring errors when it is already gone."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
 
-async def _write_temp_upload(uploaded_file: UploadFile, extension: str) -> str:
-    """Write UploadFile content to a temporary file and return its path."""
-    with tempfile.NamedTemporaryFile(
-        delete=False, suffix=f".{extension}"
-    ) as temp_input:
-        content = await uploaded_file.read()
-        temp_input.write(content)
-        temp_input.flush()
-        return temp_input.name
 
+def _output_filename(filename: str, digest: str) -> str:
+    """Build a content-derived output filename.
 
-def _output_filename(filename: str, unique_output: bool) -> str:
-    """Build a processed output filename, optionally avoiding batch collisions."""
-    if unique_output:
-        return f"processed_{uuid.uuid4().hex[:8]}_{filename}"
-    return f"processed_{filename}"
+    Batch uploads sharing a name get distinct outputs, and a given name always
+    refers to the same bytes, so downloads can be cached as immutable.
+    """
+    return f"processed_{digest[:8]}_{filename}"
 
 
 def _template_context(
@@ -183,6 +384,4 @@ def _form_error_message(error: str) -> str:
     """Preserve the friendlier single-upload wording for missing selections."""
     if error == "No file selected.":
         return "No file selected. Please choose a supported file."
-    if error == "Invalid file name. Extension missing.":
-        return "Invalid file name. Please upload a file with a proper extension."
     return error
@@ -0,0 +1,61 @@
+"""Process pool for running CPU-bound document processors off the event loop."""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from utils.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def process_pool_size() -> int:
+    """Split the CPUs between uvicorn worker processes (WEB_CONCURRENCY)."""
+    server_workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    return max(1, (os.cpu_count() or 1) // server_workers)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        # spawn avoids inheriting open PyMuPDF handles and event-loop threads.
+        # Spawned workers start without the app's logging setup (under
+        # `uvicorn app:app` they never import app.py), so configure it there.
+        max_workers = process_pool_size()
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_logging,
+        )
+        logger.info("Started processing pool (%s workers)", max_workers)
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the shared process pool if it was started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def run_in_process_pool(func: Callable[..., T], *args: Any) -> T:
+    """Run a picklable callable in the shared process pool."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_process_pool(), func, *args)
+    except BrokenProcessPool:
+        # A crashed worker poisons the pool; start a fresh one next time.
+        logger.error("Processing pool worker died; restarting pool")
+        shutdown_process_pool()
+        raise